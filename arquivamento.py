@@ -0,0 +1,135 @@
+"""
+Retenção dos acessos: o que passa do horizonte (DIAS_RETENCAO) sai do
+sistema_campus.db e vai para um arquivo SQLite por mês em arquivo_acessos/
+(acessos_2026-03.db, ...). A tabela quente fica pequena para a portaria e o
+monitoramento; os relatórios consultam os meses arquivados do período pedido,
+um arquivo por vez.
+
+Os resumos por hora/dia (resumos.py) não são tocados: os gráficos continuam
+enxergando o histórico inteiro.
+
+Exemplos:
+    python arquivamento.py                # arquiva o que tiver mais de DIAS_RETENCAO dias
+    python arquivamento.py --dias 30
+"""
+import argparse
+import glob
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+# --- CONFIGURAÇÕES ---
+PASTA_ARQUIVO = os.environ.get("ARQUIVO_ACESSOS", "arquivo_acessos")
+DIAS_RETENCAO = int(os.environ.get("RETENCAO_DIAS", "90"))
+PADRAO_ARQUIVO = re.compile(r"acessos_(\d{4}-\d{2})\.db$")
+
+def caminho_mes(mes):
+    """Arquivo do mês ('2026-03')."""
+    return os.path.join(PASTA_ARQUIVO, f"acessos_{mes}.db")
+
+def meses_arquivados():
+    """Meses com arquivo, do mais recente para o mais antigo."""
+    meses = []
+    for caminho in glob.glob(os.path.join(PASTA_ARQUIVO, "acessos_*.db")):
+        achou = PADRAO_ARQUIVO.search(caminho)
+        if achou:
+            meses.append(achou.group(1))
+    return sorted(meses, reverse=True)
+
+def particoes(data_inicio=None, data_fim=None):
+    """
+    Partes do histórico que podem ter acessos no período (datas inclusivas,
+    objetos date; None = sem limite), na ordem do mais recente para o mais
+    antigo. None representa a tabela quente; os outros itens são meses arquivados.
+    """
+    primeiro = data_inicio.strftime("%Y-%m") if data_inicio else "0000-00"
+    ultimo = data_fim.strftime("%Y-%m") if data_fim else "9999-99"
+    return [None] + [mes for mes in meses_arquivados() if primeiro <= mes <= ultimo]
+
+@contextmanager
+def anexar_particao(conn, mes):
+    """
+    Disponibiliza a partição na conexão do banco principal e devolve o nome da
+    tabela a usar no FROM (os JOINs com 'veiculos' continuam funcionando).
+    """
+    if mes is None:
+        yield "acessos"
+        return
+    conn.execute("ATTACH DATABASE ? AS arquivo_mes", (caminho_mes(mes),))
+    try:
+        yield "arquivo_mes.acessos"
+    finally:
+        conn.execute("DETACH DATABASE arquivo_mes")
+
+def _preparar_arquivo(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS arquivo_mes.acessos (
+            id INTEGER PRIMARY KEY,
+            placa TEXT,
+            data_hora DATETIME,
+            status TEXT,
+            evidencia TEXT
+        )
+    ''')
+    # Arquivos criados antes da coluna 'evidencia'
+    colunas = [linha[1] for linha in conn.execute("PRAGMA arquivo_mes.table_info(acessos)")]
+    if "evidencia" not in colunas:
+        conn.execute("ALTER TABLE arquivo_mes.acessos ADD COLUMN evidencia TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS arquivo_mes.idx_acessos_data_hora ON acessos (data_hora)")
+    conn.execute("CREATE INDEX IF NOT EXISTS arquivo_mes.idx_acessos_placa ON acessos (placa)")
+
+def arquivar_acessos(conn, dias=DIAS_RETENCAO, hoje=None):
+    """
+    Move para os arquivos mensais os acessos anteriores a (hoje - dias).
+    Cada mês é copiado e apagado numa transação; se o processo cair no meio,
+    rodar de novo não duplica nada (o id é a chave no arquivo).
+    Retorna {mes: quantidade_movida}.
+    """
+    hoje = hoje or date.today()
+    corte = (hoje - timedelta(days=dias)).strftime("%Y-%m-%d")
+    meses = [linha[0] for linha in conn.execute(
+        "SELECT DISTINCT substr(data_hora, 1, 7) FROM acessos WHERE data_hora < ? ORDER BY 1", (corte,))]
+    if not meses:
+        return {}
+
+    os.makedirs(PASTA_ARQUIVO, exist_ok=True)
+    movidos = {}
+    for mes in meses:
+        inicio = f"{mes}-01"
+        fim = min(corte, (datetime.strptime(inicio, "%Y-%m-%d") + timedelta(days=32)).strftime("%Y-%m-01"))
+        conn.execute("ATTACH DATABASE ? AS arquivo_mes", (caminho_mes(mes),))
+        try:
+            _preparar_arquivo(conn)
+            with conn:
+                conn.execute("""
+                    INSERT OR IGNORE INTO arquivo_mes.acessos (id, placa, data_hora, status, evidencia)
+                    SELECT id, placa, data_hora, status, evidencia FROM main.acessos
+                    WHERE data_hora >= ? AND data_hora < ?
+                """, (inicio, fim))
+                movidos[mes] = conn.execute(
+                    "DELETE FROM main.acessos WHERE data_hora >= ? AND data_hora < ?", (inicio, fim)).rowcount
+        finally:
+            conn.execute("DETACH DATABASE arquivo_mes")
+    return movidos
+
+def main():
+    from banco_dados import BancoDeDados, ARQUIVO_BANCO
+
+    parser = argparse.ArgumentParser(description="Arquiva os acessos antigos em arquivos mensais.")
+    parser.add_argument("--banco", default=ARQUIVO_BANCO)
+    parser.add_argument("--dias", type=int, default=DIAS_RETENCAO, help="Acessos mais novos que isso ficam no banco")
+    args = parser.parse_args()
+
+    db = BancoDeDados(args.banco) # Garante as tabelas
+    try:
+        movidos = arquivar_acessos(db.conn, args.dias)
+    finally:
+        db.fechar()
+    for mes, quantidade in movidos.items():
+        print(f"{mes}: {quantidade} acessos arquivados em {caminho_mes(mes)}")
+    if not movidos:
+        print(f"Nenhum acesso com mais de {args.dias} dias.")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,62 @@
 import sqlite3
-from datetime import datetime
+import threading
+from carga_veiculos import ERRO_LEITURA
+from indice_placas import IndicePlacas, formato_placa
+from registro_acessos import EscritorAcessos
+from resumos import criar_tabelas_resumo
+
+ARQUIVO_BANCO = 'sistema_campus.db'
+
+# Intervalo (s) em que o cache de veículos confere se outro processo
+# (ex.: o dashboard) alterou a tabela 'veiculos'
+INTERVALO_SINCRONIZACAO = 0.5
+
+# Valores aceitos no cadastro (importação e dashboard), na ordem em que aparecem na tela
+TIPOS_VEICULO = ("CARRO", "MOTO", "ONIBUS", "CAMINHAO")
+CATEGORIAS_VEICULO = ("OFICIAL", "PARTICULAR")
+STATUS_VEICULO = ("AUTORIZADO", "BLOQUEADO")
+
+# Confiança mínima para aceitar uma placa cadastrada "parecida" com a lida
+CONFIANCA_MINIMA_APROXIMADA = 0.6
+
+class RegistroVeiculo:
+    """Registro compacto de um veículo em memória (aceita registro['campo'])."""
+    __slots__ = ("placa", "proprietario", "tipo", "categoria", "status")
+
+    def __init__(self, placa, proprietario, tipo, categoria, status):
+        self.placa = placa
+        self.proprietario = proprietario
+        self.tipo = tipo
+        self.categoria = categoria
+        self.status = status
+
+    def __getitem__(self, campo):
+        return getattr(self, campo)
+
+    def get(self, campo, padrao=None):
+        return getattr(self, campo, padrao)
+
+    def __repr__(self):
+        return f"RegistroVeiculo({self.placa!r}, {self.proprietario!r}, {self.status!r})"
 
 class BancoDeDados:
-    def __init__(self):
+    def __init__(self, caminho=ARQUIVO_BANCO):
         # Cria ou conecta ao arquivo 'sistema_campus.db'
-        self.conn = sqlite3.connect('sistema_campus.db')
+        self.caminho = caminho
+        self.conn = sqlite3.connect(caminho)
+        # WAL: leituras do dashboard não travam as gravações da portaria (e vice-versa)
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self.cursor = self.conn.cursor()
         self.criar_tabelas()
+        self._escritor_acessos = None # Criado no primeiro registrar_acesso
+
+        # Cache de veículos (placa -> RegistroVeiculo), carregado no primeiro uso
+        self._cache = None
+        self._indice = None # Busca aproximada (erros de OCR), mantido junto com o cache
+        self._ultima_alteracao = 0
+        self._trava_cache = threading.Lock()
+        self._parar_sincronizacao = threading.Event()
+        self._thread_sincronizacao = None
 
     def criar_tabelas(self):
         # Tabela 1: Veículos e Proprietários
@@ -24,9 +74,50 @@ class BancoDeDados:
             CREATE TABLE IF NOT EXISTS acessos (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 placa TEXT,
-                data_hora DATETIME
+                data_hora DATETIME,
+                status TEXT DEFAULT 'AUTORIZADO',  -- Decisão: AUTORIZADO, BLOQUEADO ou NAO CADASTRADO
+                evidencia TEXT    -- Chave das imagens em evidencias/ (evidencias.py)
+            )
+        ''')
+        # Bases antigas: 'acessos' só guardava as entradas autorizadas, sem 'status' nem 'evidencia'
+        colunas = [linha[1] for linha in self.cursor.execute("PRAGMA table_info(acessos)")]
+        if "status" not in colunas:
+            self.cursor.execute("ALTER TABLE acessos ADD COLUMN status TEXT DEFAULT 'AUTORIZADO'")
+        if "evidencia" not in colunas:
+            self.cursor.execute("ALTER TABLE acessos ADD COLUMN evidencia TEXT")
+        # Índices usados pelo dashboard (ordenação por horário e busca por placa)
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_acessos_data_hora ON acessos (data_hora)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_acessos_placa ON acessos (placa)")
+        # Tabela 3: Diário de alterações em 'veiculos' (alimentado por triggers),
+        # usado para atualizar o cache em memória só com o que mudou
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS veiculos_alteracoes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                placa TEXT
+            )
+        ''')
+        self.cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS veiculos_ai AFTER INSERT ON veiculos BEGIN
+                INSERT INTO veiculos_alteracoes (placa) VALUES (NEW.placa);
+            END;
+            CREATE TRIGGER IF NOT EXISTS veiculos_au AFTER UPDATE ON veiculos BEGIN
+                INSERT INTO veiculos_alteracoes (placa) VALUES (OLD.placa);
+                INSERT INTO veiculos_alteracoes (placa) VALUES (NEW.placa);
+            END;
+            CREATE TRIGGER IF NOT EXISTS veiculos_ad AFTER DELETE ON veiculos BEGIN
+                INSERT INTO veiculos_alteracoes (placa) VALUES (OLD.placa);
+            END;
+        ''')
+        # Tabela 4: Métricas da portaria (FPS, latências, filas...), publicadas pelo main.py
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS metricas_sistema (
+                chave TEXT PRIMARY KEY,
+                valor REAL,
+                atualizado_em DATETIME
             )
         ''')
+        # Tabela 5: Resumos por hora/dia dos acessos (gráficos do dashboard)
+        criar_tabelas_resumo(self.cursor)
         self.conn.commit()
 
     def cadastrar_veiculo(self, placa, proprietario, tipo, categoria, status="AUTORIZADO"):
@@ -36,30 +127,229 @@ class BancoDeDados:
                 VALUES (?, ?, ?, ?, ?)
             """, (placa.upper(), proprietario, tipo, categoria, status))
             self.conn.commit()
-            return True
         except sqlite3.IntegrityError:
             return False # Placa já existe
 
+        # Escrita feita por esta conexão: atualiza o cache na hora
+        if self._cache is not None:
+            with self._trava_cache:
+                self._aplicar_alteracoes(self.conn)
+        return True
+
+    def importar_veiculos(self, registros):
+        """
+        Importação em massa (upsert): cada registro é um dict com placa,
+        proprietario, tipo, categoria e status (padrão AUTORIZADO). Tudo numa
+        transação só, com executemany; se algo falhar no banco, nada é gravado.
+        Linhas inválidas são puladas e contadas como rejeitadas.
+        Retorna {"inseridos", "atualizados", "inalterados", "rejeitados", "erros"},
+        onde 'erros' lista (numero_do_registro, motivo) das rejeitadas.
+        """
+        resultado = {"inseridos": 0, "atualizados": 0, "inalterados": 0, "rejeitados": 0, "erros": []}
+
+        # Estado atual da tabela, para separar inseridos/atualizados e não
+        # regravar (nem disparar os triggers de) linhas que não mudaram
+        existentes = {linha[0]: linha[1:] for linha in self.conn.execute(
+            "SELECT placa, proprietario, tipo, categoria, status FROM veiculos")}
+
+        def validos():
+            for numero, registro in enumerate(registros, start=1):
+                linha, motivo = normalizar_veiculo(registro)
+                if motivo:
+                    resultado["rejeitados"] += 1
+                    resultado["erros"].append((numero, motivo))
+                    continue
+                atual = existentes.get(linha[0])
+                if atual == linha[1:]:
+                    resultado["inalterados"] += 1
+                    continue
+                resultado["inseridos" if atual is None else "atualizados"] += 1
+                existentes[linha[0]] = linha[1:]
+                yield linha
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO veiculos (placa, proprietario, tipo, categoria, status)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(placa) DO UPDATE SET proprietario = excluded.proprietario,
+                                                 tipo = excluded.tipo,
+                                                 categoria = excluded.categoria,
+                                                 status = excluded.status
+            """, validos())
+
+        if self._cache is not None:
+            with self._trava_cache:
+                self._aplicar_alteracoes(self.conn)
+        return resultado
+
     def buscar_veiculo(self, placa):
-        # Busca informações da placa
-        self.cursor.execute("SELECT * FROM veiculos WHERE placa = ?", (placa.upper(),))
-        resultado = self.cursor.fetchone()
-        
-        if resultado:
-            # Transforma a tupla em um dicionário para ficar fácil de ler
-            return {
-                "placa": resultado[0],
-                "proprietario": resultado[1],
-                "tipo": resultado[2],
-                "categoria": resultado[3],
-                "status": resultado[4]
-            }
-        return None
-
-    def registrar_acesso(self, placa):
-        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute("INSERT INTO acessos (placa, data_hora) VALUES (?, ?)", (placa.upper(), agora))
-        self.conn.commit()
+        # Busca informações da placa no cache em memória (não toca no disco)
+        if self._cache is None:
+            self.carregar_cache()
+        return self._cache.get(placa.upper())
+
+    def buscar_veiculo_aproximado(self, placa, confianca_minima=CONFIANCA_MINIMA_APROXIMADA):
+        """
+        Placa cadastrada mais parecida com a leitura (O/0, I/1, B/8...).
+        Retorna (registro, confianca); registro é None abaixo da confiança mínima.
+        """
+        if self._cache is None:
+            self.carregar_cache()
+        placa_cadastrada, confianca = self._indice.buscar(placa)
+        if placa_cadastrada is None or confianca < confianca_minima:
+            return None, confianca
+        return self._cache.get(placa_cadastrada), confianca
+
+    def registrar_acesso(self, placa, instante=None, status="AUTORIZADO", evidencia=None):
+        """
+        Enfileira o acesso (ou a tentativa, com a decisão em 'status') para
+        gravação em lote (não espera o disco).
+        'instante' (timestamp) permite registrar o horário de uma gravação antiga.
+        'evidencia(placa, instante)' devolve a chave das imagens; só é chamada
+        se o acesso for de fato registrado (repetições não guardam imagem).
+        Retorna False se a mesma placa já passou dentro da janela de repetição.
+        """
+        if self._escritor_acessos is None:
+            self._escritor_acessos = EscritorAcessos(self.caminho)
+        return self._escritor_acessos.registrar(placa, instante, status, evidencia)
+
+    # --- CACHE DE VEÍCULOS ---
+
+    def carregar_cache(self):
+        """
+        Carrega a tabela inteira em memória (e o índice da busca aproximada) e
+        liga a sincronização em segundo plano. A portaria chama na
+        inicialização, para o primeiro carro não pagar a carga; as buscas
+        chamam sozinhas se ninguém chamou antes. Usa conexão própria, então
+        pode rodar em qualquer thread.
+        """
+        with self._trava_cache:
+            if self._cache is not None:
+                return
+            conn = sqlite3.connect(self.caminho)
+            try:
+                self._recarregar(conn)
+            finally:
+                conn.close()
+
+        self._thread_sincronizacao = threading.Thread(
+            target=self._sincronizar, name="cache-veiculos", daemon=True)
+        self._thread_sincronizacao.start()
+
+    def atualizar_cache(self, conn):
+        """
+        Aplica na hora o que outra conexão acabou de gravar em 'veiculos' (ex.:
+        cadastro pelo servico_eventos), sem esperar a sincronização. 'conn'
+        deve pertencer à thread que chama.
+        """
+        if self._cache is None:
+            return
+        with self._trava_cache:
+            self._aplicar_alteracoes(conn)
+
+    def _recarregar(self, conn):
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MAX(seq), 0) FROM veiculos_alteracoes")
+        self._ultima_alteracao = cur.fetchone()[0]
+        cur.execute("SELECT placa, proprietario, tipo, categoria, status FROM veiculos")
+        cache = {linha[0]: RegistroVeiculo(*linha) for linha in cur}
+        self._indice = IndicePlacas(cache)
+        self._cache = cache
+
+    def _aplicar_alteracoes(self, conn):
+        """Relê só as placas alteradas desde a última sincronização."""
+        cur = conn.cursor()
+        cur.execute("SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM veiculos_alteracoes")
+        primeira, ultima = cur.fetchone()
+        if ultima == self._ultima_alteracao:
+            return
+        if primeira > self._ultima_alteracao + 1:
+            # Outro processo já apagou do diário alterações que este cache não viu
+            self._recarregar(conn)
+            return
+
+        cur.execute("""
+            SELECT a.placa, v.proprietario, v.tipo, v.categoria, v.status, v.placa
+            FROM (SELECT DISTINCT placa FROM veiculos_alteracoes WHERE seq > ? AND seq <= ?) a
+            LEFT JOIN veiculos v ON v.placa = a.placa
+        """, (self._ultima_alteracao, ultima))
+        for placa, proprietario, tipo, categoria, status, existe in cur:
+            if existe is None:
+                self._cache.pop(placa, None) # Removido
+                self._indice.remover(placa)
+            else:
+                self._cache[placa] = RegistroVeiculo(placa, proprietario, tipo, categoria, status)
+                self._indice.adicionar(placa)
+        self._ultima_alteracao = ultima
+        self._podar_diario(conn)
+
+    def _podar_diario(self, conn):
+        """
+        Apaga do diário o que já foi aplicado. A última linha fica: o maior
+        'seq' é a versão do cadastro lida pelo dashboard.
+        """
+        try:
+            with conn:
+                conn.execute("DELETE FROM veiculos_alteracoes WHERE seq < ?", (self._ultima_alteracao,))
+        except sqlite3.OperationalError:
+            pass # Banco ocupado: poda na próxima sincronização
+
+    def _sincronizar(self):
+        """
+        Thread de fundo com conexão própria. 'PRAGMA data_version' só muda quando
+        outra conexão grava no arquivo, então na maior parte do tempo a conferência
+        não faz consulta nenhuma.
+        """
+        conn = sqlite3.connect(self.caminho)
+        versao = None
+        try:
+            while not self._parar_sincronizacao.wait(INTERVALO_SINCRONIZACAO):
+                try:
+                    nova_versao = conn.execute("PRAGMA data_version").fetchone()[0]
+                    if nova_versao == versao:
+                        continue
+                    with self._trava_cache:
+                        self._aplicar_alteracoes(conn)
+                    versao = nova_versao
+                except sqlite3.Error as e:
+                    # Banco ocupado por outro processo: tenta de novo na próxima volta
+                    print(f"[cache] Falha ao sincronizar veículos: {e}")
+        finally:
+            conn.close()
 
     def fechar(self):
-        self.conn.close()
\ No newline at end of file
+        if self._escritor_acessos:
+            self._escritor_acessos.fechar()
+        self._parar_sincronizacao.set()
+        if self._thread_sincronizacao:
+            self._thread_sincronizacao.join(timeout=2)
+        self.conn.close()
+
+def normalizar_veiculo(registro):
+    """Limpa e valida um registro da importação. Retorna (tupla, None) ou (None, motivo)."""
+    if not isinstance(registro, dict):
+        return None, "linha não é um objeto" # Ex.: JSONL com lista, texto ou número
+    if ERRO_LEITURA in registro:
+        return None, registro[ERRO_LEITURA] # Linha do arquivo que não deu para ler
+
+    def campo(nome, padrao=""):
+        valor = registro.get(nome)
+        return padrao if valor is None or str(valor).strip() == "" else str(valor).strip()
+
+    placa = campo("placa").upper().replace("-", "").replace(" ", "")
+    proprietario = campo("proprietario")
+    tipo = campo("tipo").upper()
+    categoria = campo("categoria", "PARTICULAR").upper()
+    status = campo("status", "AUTORIZADO").upper()
+
+    if not formato_placa(placa):
+        return None, f"placa inválida: {placa or '(vazia)'}"
+    if not proprietario:
+        return None, f"{placa}: proprietário vazio"
+    if tipo not in TIPOS_VEICULO:
+        return None, f"{placa}: tipo inválido ({tipo or 'vazio'})"
+    if categoria not in CATEGORIAS_VEICULO:
+        return None, f"{placa}: categoria inválida ({categoria})"
+    if status not in STATUS_VEICULO:
+        return None, f"{placa}: status inválido ({status})"
+    return (placa, proprietario, tipo, categoria, status), None
@@ -0,0 +1,301 @@
+"""
+Benchmark por estágio do reconhecimento, usando as imagens de simulacao_IMG/
+e frames sintéticos (várias resoluções e quantidades de veículos).
+
+Mostra p50/p95/p99 (ms) e vazão (ops/s) de cada estágio e do fluxo completo.
+Estágios que dependem de bibliotecas não instaladas (YOLO, EasyOCR) são pulados.
+
+Exemplos:
+    python benchmark.py
+    python benchmark.py --estagios resize,localizador,buscar_veiculo --repeticoes 200
+    python benchmark.py --salvar-base base.json
+    python benchmark.py --comparar base.json --tolerancia 0.15
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+PASTA_IMAGENS = "simulacao_IMG"
+RESOLUCOES = [(640, 480), (1280, 720), (1920, 1080)]
+VEICULOS_POR_FRAME = [1, 2, 4]
+PLACAS_SINTETICAS = 100000
+
+# --- DADOS DE ENTRADA ---
+
+def carregar_amostras():
+    arquivos = sorted(glob.glob(os.path.join(PASTA_IMAGENS, "*")))
+    amostras = [cv2.imread(a) for a in arquivos]
+    return [a for a in amostras if a is not None]
+
+def gerar_frame_sintetico(amostras, largura, altura, veiculos, semente=0):
+    """Fundo cinza com 'veiculos' amostras coladas lado a lado."""
+    rnd = random.Random(semente)
+    frame = np.full((altura, largura, 3), 90, dtype=np.uint8)
+    largura_faixa = largura // veiculos
+    for i in range(veiculos):
+        amostra = rnd.choice(amostras)
+        escala = min(largura_faixa * 0.9 / amostra.shape[1], altura * 0.6 / amostra.shape[0])
+        redimensionada = cv2.resize(amostra, None, fx=escala, fy=escala)
+        h, w = redimensionada.shape[:2]
+        x = i * largura_faixa + (largura_faixa - w) // 2
+        y = (altura - h) // 2
+        frame[y:y + h, x:x + w] = redimensionada
+    return frame
+
+def gerar_placas(quantidade, semente=0):
+    rnd = random.Random(semente)
+    letras, digitos = string.ascii_uppercase, string.digits
+    placas = set()
+    while len(placas) < quantidade:
+        base = ''.join(rnd.choices(letras, k=3)) + rnd.choice(digitos)
+        meio = rnd.choice(letras) if rnd.random() < 0.5 else rnd.choice(digitos)
+        placas.add(base + meio + ''.join(rnd.choices(digitos, k=2)))
+    return sorted(placas)
+
+# --- MEDIÇÃO ---
+
+def medir(funcao, entradas, repeticoes):
+    """Roda 'funcao' sobre as entradas (em rodízio) e devolve as latências em ms."""
+    latencias = []
+    funcao(entradas[0]) # Aquecimento (cache, alocação, carga preguiçosa)
+    for i in range(repeticoes):
+        entrada = entradas[i % len(entradas)]
+        t0 = time.perf_counter()
+        funcao(entrada)
+        latencias.append((time.perf_counter() - t0) * 1000.0)
+    return latencias
+
+def resumir(latencias):
+    valores = np.array(latencias)
+    media = float(valores.mean())
+    return {
+        "p50": round(float(np.percentile(valores, 50)), 3),
+        "p95": round(float(np.percentile(valores, 95)), 3),
+        "p99": round(float(np.percentile(valores, 99)), 3),
+        "ops_s": round(1000.0 / media, 2) if media > 0 else None,
+        "n": len(latencias),
+    }
+
+# --- ESTÁGIOS ---
+
+class Bancada:
+    """Prepara as entradas e define as funções de cada estágio."""
+
+    def __init__(self, repeticoes):
+        self.repeticoes = repeticoes
+        self.amostras = carregar_amostras()
+        if not self.amostras:
+            sys.exit(f"Nenhuma imagem em {PASTA_IMAGENS}/")
+
+        self.frames = {}
+        for largura, altura in RESOLUCOES:
+            for veiculos in VEICULOS_POR_FRAME:
+                self.frames[(largura, altura, veiculos)] = gerar_frame_sintetico(
+                    self.amostras, largura, altura, veiculos, semente=largura + veiculos)
+        self.frames_800 = [cv2.resize(f, (800, 600)) for f in self.frames.values()]
+        self.jpegs = [cv2.imencode(".jpg", f)[1] for f in self.frames.values()]
+
+        self._model = None
+        self._reader = None
+        self._db = None
+        self._pasta_temp = None
+
+    # Recursos carregados só se o estágio for pedido
+    def model(self):
+        if self._model is None:
+            from reconhecimento import carregar_detector
+            self._model = carregar_detector()
+        return self._model
+
+    def reader(self):
+        if self._reader is None:
+            import easyocr
+            self._reader = easyocr.Reader(['pt'], gpu=False)
+        return self._reader
+
+    def db(self):
+        if self._db is None:
+            from banco_dados import BancoDeDados
+            self._pasta_temp = tempfile.mkdtemp(prefix="bench_")
+            self._db = BancoDeDados(os.path.join(self._pasta_temp, "bench.db"))
+            self.placas = gerar_placas(PLACAS_SINTETICAS)
+            with self._db.conn:
+                self._db.conn.executemany(
+                    "INSERT INTO veiculos (placa, proprietario, tipo, categoria, status) VALUES (?, ?, ?, ?, ?)",
+                    ((p, "Bench", "CARRO", "PARTICULAR", "AUTORIZADO") for p in self.placas))
+            self._db.buscar_veiculo(self.placas[0]) # Carrega o cache
+        return self._db
+
+    def recortes_placa(self):
+        from localizador_placa import recortes_para_ocr
+        return [r for a in self.amostras for r in recortes_para_ocr(a)[:1]]
+
+    def estagios(self):
+        """nome -> (função, entradas). As entradas são montadas na hora."""
+        from localizador_placa import localizar_placas, recortes_para_ocr
+
+        def captura():
+            return lambda jpeg: cv2.imdecode(jpeg, cv2.IMREAD_COLOR), self.jpegs
+
+        def resize():
+            return lambda f: cv2.resize(f, (800, 600)), list(self.frames.values())
+
+        def yolo():
+            from reconhecimento import detectar_veiculos
+            model = self.model()
+            return lambda f: detectar_veiculos(model, f), self.frames_800
+
+        def equalizacao():
+            def equalizar(recorte):
+                return cv2.equalizeHist(cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY))
+            return equalizar, self.recortes_placa()
+
+        def localizador():
+            return localizar_placas, self.amostras
+
+        def ocr():
+            reader = self.reader()
+            from decodificador_placa import ALLOWLIST
+            return (lambda r: reader.readtext(cv2.cvtColor(r, cv2.COLOR_BGR2GRAY), allowlist=ALLOWLIST),
+                    self.recortes_placa())
+
+        def buscar_veiculo():
+            db = self.db()
+            return db.buscar_veiculo, self.placas[::97]
+
+        def buscar_aproximado():
+            db = self.db()
+            trocas = str.maketrans("0O1I8B", "O0I1B8")
+            return db.buscar_veiculo_aproximado, [p.translate(trocas) for p in self.placas[::97]]
+
+        def registrar_acesso():
+            db = self.db()
+            return db.registrar_acesso, self.placas[::13]
+
+        def interface():
+            from painel import PainelOperador
+            painel = PainelOperador()
+            estado = ([(100, 100, 400, 400, "CARRO", "CARRO #1 ABC1234")], "CARRO", "ABC1234",
+                      {"proprietario": "Bench", "tipo": "CARRO"}, "AUTORIZADO")
+            return lambda f: painel.desenhar(f, *estado), self.frames_800
+
+        def ponta_a_ponta():
+            from reconhecimento import detectar_veiculos, recortar, decidir_acesso
+            from decodificador_placa import decodificar, ALLOWLIST
+            model, reader, db = self.model(), self.reader(), self.db()
+
+            def fluxo(frame):
+                frame = cv2.resize(frame, (800, 600))
+                for caixa, _ in detectar_veiculos(model, frame):
+                    for recorte in recortes_para_ocr(recortar(frame, caixa)):
+                        gray = cv2.equalizeHist(cv2.cvtColor(recorte, cv2.COLOR_BGR2GRAY))
+                        placa, _ = decodificar(reader.readtext(gray, allowlist=ALLOWLIST))
+                        if placa:
+                            decidir_acesso(db, placa)
+            return fluxo, list(self.frames.values())
+
+        return {
+            "captura": captura,
+            "resize": resize,
+            "yolo": yolo,
+            "equalizacao": equalizacao,
+            "localizador": localizador,
+            "ocr": ocr,
+            "buscar_veiculo": buscar_veiculo,
+            "buscar_aproximado": buscar_aproximado,
+            "registrar_acesso": registrar_acesso,
+            "interface": interface,
+            "ponta_a_ponta": ponta_a_ponta,
+        }
+
+    def rodar(self, nomes=None):
+        resultados = {}
+        estagios = self.estagios()
+        for nome in nomes or estagios:
+            if nome not in estagios:
+                print(f"{nome:<18} estágio desconhecido")
+                continue
+            try:
+                funcao, entradas = estagios[nome]()
+            except (ImportError, RuntimeError) as e: # Dependência ou backend (ex.: detector) indisponível
+                print(f"{nome:<18} pulado ({e})")
+                continue
+            # Estágios pesados rodam menos vezes
+            repeticoes = self.repeticoes if nome not in ("yolo", "ocr", "ponta_a_ponta") else max(5, self.repeticoes // 10)
+            resultados[nome] = resumir(medir(funcao, entradas, repeticoes))
+            r = resultados[nome]
+            print(f"{nome:<18} p50 {r['p50']:>9.3f} ms | p95 {r['p95']:>9.3f} ms | "
+                  f"p99 {r['p99']:>9.3f} ms | {r['ops_s']:>10} ops/s")
+        return resultados
+
+    def fechar(self):
+        if self._db:
+            self._db.fechar()
+        if self._pasta_temp:
+            shutil.rmtree(self._pasta_temp, ignore_errors=True)
+
+# --- COMPARAÇÃO COM A BASE ---
+
+def comparar(resultados, base, tolerancia):
+    """Imprime a variação contra a base. Retorna a lista de estágios que pioraram."""
+    regressoes = []
+    print("-" * 30)
+    print(f"Comparação com a base (tolerância {tolerancia:.0%}):")
+    for nome, atual in resultados.items():
+        anterior = base.get("estagios", {}).get(nome)
+        if not anterior:
+            print(f"{nome:<18} sem base")
+            continue
+        for metrica in ("p50", "p95"):
+            if anterior[metrica] <= 0:
+                continue
+            variacao = atual[metrica] / anterior[metrica] - 1.0
+            marca = "REGRESSÃO" if variacao > tolerancia else "ok"
+            print(f"{nome:<18} {metrica} {anterior[metrica]:>9.3f} -> {atual[metrica]:>9.3f} ms "
+                  f"({variacao:+.1%}) {marca}")
+            if variacao > tolerancia:
+                regressoes.append(f"{nome}.{metrica}")
+    return regressoes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por estágio do reconhecimento de placas.")
+    parser.add_argument("--repeticoes", type=int, default=100)
+    parser.add_argument("--estagios", help="Lista separada por vírgula (padrão: todos)")
+    parser.add_argument("--salvar-base", help="Salva os resultados como base (JSON)")
+    parser.add_argument("--comparar", help="Compara com uma base salva; sai com código 1 se piorar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora aceita antes de acusar regressão")
+    args = parser.parse_args()
+
+    bancada = Bancada(args.repeticoes)
+    try:
+        nomes = args.estagios.split(",") if args.estagios else None
+        resultados = bancada.rodar(nomes)
+    finally:
+        bancada.fechar()
+
+    if args.salvar_base:
+        with open(args.salvar_base, "w", encoding="utf-8") as f:
+            json.dump({"criado_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "estagios": resultados}, f, indent=2)
+        print(f"Base salva em {args.salvar_base}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(resultados, base, args.tolerancia)
+        if regressoes:
+            print(f"Regressões: {', '.join(regressoes)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import csv
+import json
+import os
+
+# Leitura e escrita de arquivos de veículos (CSV ou JSONL) para a importação
+# em massa. O formato é escolhido pela extensão; nada é carregado inteiro em
+# memória, as linhas passam uma a uma.
+
+COLUNAS_VEICULO = ["placa", "proprietario", "tipo", "categoria", "status"]
+ERRO_LEITURA = "_erro_leitura" # Chave do registro gerado para linha que não deu para ler
+LINHAS_POR_LOTE_EXPORTACAO = 5000
+
+def formato_arquivo(caminho):
+    """'jsonl' ou 'csv', pela extensão do arquivo."""
+    return "jsonl" if os.path.splitext(caminho)[1].lower() in (".jsonl", ".ndjson") else "csv"
+
+def ler_veiculos(caminho):
+    """
+    Gera um registro por veículo do arquivo (no JSONL, o que não for objeto
+    é rejeitado na importação; linha que nem é JSON vira um registro só com
+    ERRO_LEITURA, com o número da linha). No CSV a primeira linha é o
+    cabeçalho (nomes das colunas) e o separador pode ser ',' ou ';'
+    (padrão do Excel em português).
+    """
+    if formato_arquivo(caminho) == "jsonl":
+        with open(caminho, encoding="utf-8") as f:
+            for numero, linha in enumerate(f, start=1):
+                linha = linha.strip()
+                if not linha:
+                    continue
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError as e:
+                    # Rejeitado na importação com este motivo (não como "placa inválida")
+                    yield {ERRO_LEITURA: f"JSON inválido (linha {numero} do arquivo: {e.msg})"}
+        return
+
+    with open(caminho, encoding="utf-8-sig", newline="") as f:
+        amostra = f.read(4096)
+        f.seek(0)
+        separador = ";" if amostra.count(";") > amostra.count(",") else ","
+        leitor = csv.DictReader(f, delimiter=separador)
+        leitor.fieldnames = [c.strip().lower() for c in leitor.fieldnames or []]
+        yield from leitor
+
+def exportar_veiculos(conn, caminho):
+    """Grava a tabela 'veiculos' no arquivo, em blocos. Retorna a quantidade exportada."""
+    cur = conn.execute(f"SELECT {', '.join(COLUNAS_VEICULO)} FROM veiculos ORDER BY placa")
+    total = 0
+    jsonl = formato_arquivo(caminho) == "jsonl"
+    with open(caminho, "w", encoding="utf-8", newline="") as f:
+        escritor = None if jsonl else csv.writer(f)
+        if escritor:
+            escritor.writerow(COLUNAS_VEICULO)
+        while True:
+            linhas = cur.fetchmany(LINHAS_POR_LOTE_EXPORTACAO)
+            if not linhas:
+                break
+            if jsonl:
+                f.writelines(json.dumps(dict(zip(COLUNAS_VEICULO, linha)), ensure_ascii=False) + "\n"
+                             for linha in linhas)
+            else:
+                escritor.writerows(linhas)
+            total += len(linhas)
+    return total
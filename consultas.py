@@ -0,0 +1,336 @@
+import csv
+import queue
+import sqlite3
+from contextlib import contextmanager
+
+import pandas as pd
+
+from arquivamento import particoes, anexar_particao
+
+# Consultas de leitura usadas pelo dashboard. Todas recebem a conexão e
+# devolvem só o necessário para a tela, para o custo não crescer com o histórico.
+
+# --- CONEXÕES DE LEITURA ---
+
+TAMANHO_POOL_LEITURA = 4
+
+class PoolLeitura:
+    """
+    Conexões somente leitura compartilhadas entre as sessões do dashboard.
+    Cada consulta pega uma conexão emprestada e devolve no fim; com o banco em
+    WAL, as leituras não disputam o lock com as gravações da portaria.
+    """
+
+    def __init__(self, caminho, tamanho=TAMANHO_POOL_LEITURA):
+        self.caminho = caminho
+        self._livres = queue.Queue()
+        self._vagas = queue.Queue()
+        for _ in range(tamanho):
+            self._vagas.put(None) # Conexões abertas só quando precisar
+
+    def _abrir(self):
+        conn = sqlite3.connect(f"file:{self.caminho}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão (espera se todas estiverem em uso)."""
+        try:
+            conn = self._livres.get_nowait()
+        except queue.Empty:
+            try:
+                self._vagas.get_nowait()
+                conn = self._abrir()
+            except queue.Empty:
+                conn = self._livres.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._livres.put(conn)
+
+def versao_veiculos(conn):
+    """Muda sempre que 'veiculos' muda (diário alimentado pelos triggers)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM veiculos_alteracoes").fetchone()[0]
+
+def versao_resumos(conn):
+    """Último acesso somado nos resumos: muda quando entram acessos novos."""
+    linha = conn.execute("SELECT ultimo_id FROM acessos_resumo_controle WHERE id = 1").fetchone()
+    return linha[0] if linha else 0
+
+def carregar_veiculos(conn):
+    """Cadastro completo de veículos."""
+    return pd.read_sql_query("SELECT placa, proprietario, tipo, categoria, status FROM veiculos", conn)
+
+# --- MONITORAMENTO ---
+
+COLUNAS_ACESSO = """
+    a.id,
+    a.placa,
+    v.proprietario,
+    v.tipo,
+    v.categoria,
+    a.status as 'Decisão',
+    a.data_hora as 'Horário Entrada'
+"""
+
+def carregar_acessos_recentes(conn, limite=15):
+    """Últimas entradas autorizadas (pelo id, que cresce junto com o horário)."""
+    query = f"""
+    SELECT {COLUNAS_ACESSO}
+    FROM acessos a
+    LEFT JOIN veiculos v ON a.placa = v.placa
+    WHERE a.status = 'AUTORIZADO'
+    ORDER BY a.id DESC
+    LIMIT ?
+    """
+    return pd.read_sql_query(query, conn, params=(limite,))
+
+def carregar_acessos_desde(conn, ultimo_id):
+    """Só as entradas autorizadas gravadas depois do último id já mostrado."""
+    query = f"""
+    SELECT {COLUNAS_ACESSO}
+    FROM acessos a
+    LEFT JOIN veiculos v ON a.placa = v.placa
+    WHERE a.id > ? AND a.status = 'AUTORIZADO'
+    ORDER BY a.id DESC
+    """
+    return pd.read_sql_query(query, conn, params=(ultimo_id,))
+
+def contar_acessos(conn):
+    """
+    Métricas do topo calculadas pelo SQLite: total, carros, motos e o maior id.
+    Soma a tabela quente e os meses arquivados, para o total não cair depois
+    do arquivamento. Feito uma vez ao abrir a página; depois é atualizado só
+    com os acessos novos.
+    """
+    metricas = {"total": 0, "carros": 0, "motos": 0, "ultimo_id": 0}
+    for mes in particoes():
+        with anexar_particao(conn, mes) as tabela:
+            total, carros, motos, ultimo_id = conn.execute(f"""
+                SELECT COUNT(*),
+                       COALESCE(SUM(v.tipo = 'CARRO'), 0),
+                       COALESCE(SUM(v.tipo = 'MOTO'), 0),
+                       COALESCE(MAX(a.id), 0)
+                FROM {tabela} a
+                LEFT JOIN veiculos v ON a.placa = v.placa
+                WHERE a.status = 'AUTORIZADO'
+            """).fetchone()
+        metricas["total"] += total
+        metricas["carros"] += carros
+        metricas["motos"] += motos
+        metricas["ultimo_id"] = max(metricas["ultimo_id"], ultimo_id)
+    return metricas
+
+def somar_metricas(metricas, df_novos):
+    """Atualiza as métricas com as linhas novas (sem reler o histórico)."""
+    if df_novos.empty:
+        return metricas
+    ids = df_novos['id'].dropna() # Linhas vindas de evento ainda não têm id
+    return {
+        "total": metricas["total"] + len(df_novos),
+        "carros": metricas["carros"] + int((df_novos['tipo'] == 'CARRO').sum()),
+        "motos": metricas["motos"] + int((df_novos['tipo'] == 'MOTO').sum()),
+        "ultimo_id": max(metricas["ultimo_id"], int(ids.max())) if not ids.empty else metricas["ultimo_id"],
+    }
+
+def acesso_do_evento(evento):
+    """
+    Linha no formato de COLUNAS_ACESSO a partir de um evento publicado pela
+    portaria (servico_eventos.py). O id fica vazio: o acesso ainda está na
+    fila de gravação.
+    """
+    return pd.DataFrame([{
+        "id": None,
+        "placa": evento["placa"],
+        "proprietario": evento.get("proprietario"),
+        "tipo": evento.get("tipo"),
+        "categoria": evento.get("categoria"),
+        "Decisão": evento["status"],
+        "Horário Entrada": evento["data_hora"],
+    }])
+
+# --- RELATÓRIOS (filtros no SQL, paginação e exportação em streaming) ---
+# O histórico está dividido entre a tabela quente e os meses arquivados
+# (arquivamento.py). Os relatórios percorrem as partes do período pedido, da
+# mais recente para a mais antiga, uma de cada vez.
+
+TAMANHO_PAGINA = 100
+LINHAS_POR_LOTE_EXPORTACAO = 5000
+
+def montar_filtros(placa=None, tipos=None, data_inicio=None, data_fim=None, status=None):
+    """
+    Monta o WHERE parametrizado dos relatórios e a lista de partes do
+    histórico que cobrem o período. A placa é buscada pelo início
+    (intervalo >= / <), o que usa o índice de acessos.placa.
+    Datas são objetos date; o fim é inclusivo.
+    """
+    condicoes = []
+    params = []
+    prefixo = (placa or "").upper().strip()
+    if prefixo:
+        fim_prefixo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+        condicoes.append("a.placa >= ? AND a.placa < ?")
+        params += [prefixo, fim_prefixo]
+    if tipos:
+        condicao = f"v.tipo IN ({', '.join('?' for _ in tipos)})"
+        if not status or "NAO CADASTRADO" in status:
+            condicao = f"({condicao} OR v.tipo IS NULL)" # Placa sem cadastro não tem tipo
+        condicoes.append(condicao)
+        params += list(tipos)
+    if status:
+        condicoes.append(f"a.status IN ({', '.join('?' for _ in status)})")
+        params += list(status)
+    if data_inicio:
+        condicoes.append("a.data_hora >= ?")
+        params.append(data_inicio.strftime("%Y-%m-%d"))
+    if data_fim:
+        condicoes.append("a.data_hora < date(?, '+1 day')")
+        params.append(data_fim.strftime("%Y-%m-%d"))
+
+    where = ("WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    return where, params, particoes(data_inicio, data_fim)
+
+def _contar_particao(conn, tabela, where, params):
+    cursor = conn.execute(f"""
+        SELECT COUNT(*)
+        FROM {tabela} a
+        LEFT JOIN veiculos v ON a.placa = v.placa
+        {where}
+    """, params)
+    return cursor.fetchone()[0]
+
+def contar_acessos_filtrados(conn, filtros):
+    where, params, meses = filtros
+    total = 0
+    for mes in meses:
+        with anexar_particao(conn, mes) as tabela:
+            total += _contar_particao(conn, tabela, where, params)
+    return total
+
+def carregar_pagina_acessos(conn, filtros, pagina=1, por_pagina=TAMANHO_PAGINA):
+    """
+    Uma página do relatório (pagina começa em 1). Partes inteiras antes da
+    página são só contadas; a leitura começa na parte onde a página cai.
+    """
+    where, params, meses = filtros
+    query = f"""
+    SELECT {COLUNAS_ACESSO}
+    FROM {{tabela}} a
+    LEFT JOIN veiculos v ON a.placa = v.placa
+    {where}
+    ORDER BY a.data_hora DESC, a.id DESC
+    LIMIT ? OFFSET ?
+    """
+    pular = (pagina - 1) * por_pagina
+    faltam = por_pagina
+    partes = []
+    for mes in meses:
+        with anexar_particao(conn, mes) as tabela:
+            if pular:
+                quantidade = _contar_particao(conn, tabela, where, params)
+                if pular >= quantidade:
+                    pular -= quantidade
+                    continue
+            partes.append(pd.read_sql_query(query.format(tabela=tabela), conn,
+                                            params=params + [faltam, pular]))
+        pular = 0
+        faltam -= len(partes[-1])
+        if faltam <= 0:
+            break
+
+    if not partes: # Página além do fim: tabela vazia com as colunas certas
+        return pd.read_sql_query(query.format(tabela="acessos"), conn, params=params + [0, 0])
+    return pd.concat(partes, ignore_index=True)
+
+def exportar_acessos_csv(conn, filtros, arquivo):
+    """
+    Escreve o relatório filtrado em 'arquivo' (texto) lendo o cursor em lotes,
+    sem montar tudo em memória. Retorna o número de linhas exportadas.
+    """
+    where, params, meses = filtros
+    escritor = csv.writer(arquivo)
+    total = 0
+    for mes in meses:
+        with anexar_particao(conn, mes) as tabela:
+            cursor = conn.execute(f"""
+                SELECT {COLUNAS_ACESSO}
+                FROM {tabela} a
+                LEFT JOIN veiculos v ON a.placa = v.placa
+                {where}
+                ORDER BY a.data_hora DESC, a.id DESC
+            """, params)
+
+            if total == 0 and mes is None:
+                escritor.writerow([coluna[0] for coluna in cursor.description])
+            while True:
+                linhas = cursor.fetchmany(LINHAS_POR_LOTE_EXPORTACAO)
+                if not linhas:
+                    break
+                escritor.writerows(linhas)
+                total += len(linhas)
+            cursor.close()
+    return total
+
+def carregar_evidencias(conn, filtros, ids):
+    """
+    {id: chave da evidência} dos acessos da página (só os que têm imagem).
+    Separado da página para as miniaturas só serem buscadas quando pedidas.
+    """
+    ids = [int(i) for i in ids]
+    if not ids:
+        return {}
+    _, _, meses = filtros
+    marcadores = ", ".join("?" for _ in ids)
+    chaves = {}
+    for mes in meses:
+        with anexar_particao(conn, mes) as tabela:
+            try:
+                cursor = conn.execute(f"""
+                    SELECT id, evidencia FROM {tabela}
+                    WHERE id IN ({marcadores}) AND evidencia IS NOT NULL
+                """, ids)
+            except sqlite3.OperationalError:
+                continue # Arquivo de antes da coluna 'evidencia'
+            chaves.update(cursor.fetchall())
+    return chaves
+
+# --- RESUMOS (tabela acessos_resumo, mantida pelo resumos.py) ---
+
+def carregar_resumo(conn, periodo, data_inicio=None, data_fim=None, status=None):
+    """
+    Linhas do resumo no intervalo (datas inclusivas, objetos date):
+    DataFrame com inicio, tipo, categoria, status e total.
+    """
+    condicoes = ["periodo = ?"]
+    params = [periodo]
+    if data_inicio:
+        condicoes.append("inicio >= ?")
+        params.append(data_inicio.strftime("%Y-%m-%d"))
+    if data_fim:
+        condicoes.append("inicio < date(?, '+1 day')")
+        params.append(data_fim.strftime("%Y-%m-%d"))
+    if status:
+        condicoes.append(f"status IN ({', '.join('?' for _ in status)})")
+        params += list(status)
+    query = f"""
+    SELECT inicio, tipo, categoria, status, total
+    FROM acessos_resumo
+    WHERE {' AND '.join(condicoes)}
+    ORDER BY inicio
+    """
+    return pd.read_sql_query(query, conn, params=params)
+
+# --- STATUS DO SISTEMA ---
+
+def carregar_metricas_sistema(conn):
+    """Métricas publicadas pela portaria: {chave: valor} e o horário da última publicação."""
+    try:
+        linhas = conn.execute("SELECT chave, valor, atualizado_em FROM metricas_sistema").fetchall()
+    except Exception:
+        return {}, None # Portaria ainda não rodou nesta base
+    if not linhas:
+        return {}, None
+    return {chave: valor for chave, valor, _ in linhas}, max(l[2] for l in linhas)
@@ -2,6 +2,16 @@ import streamlit as st
 import sqlite3
 import pandas as pd
 import time
+import os
+import tempfile
+import base64
+import shutil
+import consultas
+from banco_dados import BancoDeDados, TIPOS_VEICULO, CATEGORIAS_VEICULO, STATUS_VEICULO
+from resumos import atualizar_resumos
+import arquivamento
+import evidencias
+import servico_eventos
 
 # --- CONFIGURAÇÃO DA PÁGINA ---
 st.set_page_config(page_title="Sistema de Controle Campus", layout="wide", page_icon="🚗")
@@ -9,104 +19,280 @@ st.set_page_config(page_title="Sistema de Controle Campus", layout="wide", page_
 st.title("Sistema de Gerenciamento de Acesso - IF Machado")
 
 # --- FUNÇÕES DE BANCO DE DADOS ---
+ARQUIVO_BANCO = 'sistema_campus.db'
+
+# O botão de download entrega o arquivo inteiro pela memória do servidor do
+# Streamlit: acima disso, o relatório sai pela linha de comando (dml.py acessos)
+MAX_LINHAS_EXPORTACAO = 100_000
+PASTA_RELATORIOS = os.path.join(tempfile.gettempdir(), "portaria_relatorios")
+IDADE_MAXIMA_RELATORIO = 3600 # Segundos até um CSV gerado (de qualquer sessão) ser apagado
+
+def limpar_relatorios_antigos():
+    """Apaga os CSVs temporários esquecidos por sessões anteriores."""
+    limite = time.time() - IDADE_MAXIMA_RELATORIO
+    for nome in os.listdir(PASTA_RELATORIOS):
+        caminho = os.path.join(PASTA_RELATORIOS, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass # Já apagado por outra sessão
 
 def get_connection():
-    return sqlite3.connect('sistema_campus.db')
+    """Conexão de escrita (cadastro e manutenção). Leituras usam o pool."""
+    return sqlite3.connect(ARQUIVO_BANCO)
 
-def carregar_acessos():
-    conn = get_connection()
-    # Query de acesso com join para pegar dados do veículo
-    query = """
-    SELECT 
-        a.id, 
-        a.placa, 
-        v.proprietario, 
-        v.tipo, 
-        v.categoria, 
-        a.data_hora as 'Horário Entrada'
-    FROM acessos a
-    LEFT JOIN veiculos v ON a.placa = v.placa
-    ORDER BY a.data_hora DESC
-    """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+@st.cache_resource
+def pool_leitura():
+    # As conexões do pool são somente leitura: antes, uma conexão de escrita
+    # cria/migra as tabelas (base antiga ou nova) e soma nos resumos os
+    # acessos que ainda não entraram
+    db = BancoDeDados(ARQUIVO_BANCO)
+    try:
+        with db.conn:
+            atualizar_resumos(db.conn)
+    finally:
+        db.fechar()
+    # Um pool só para todas as sessões/abas abertas do dashboard
+    return consultas.PoolLeitura(ARQUIVO_BANCO)
+
+@st.cache_data(max_entries=1)
+def _veiculos_na_versao(versao):
+    with pool_leitura().conexao() as conn:
+        return consultas.carregar_veiculos(conn)
 
 def carregar_todos_veiculos():
-    conn = get_connection()
-    # Pega apenas o cadastro fixo
-    query = "SELECT placa, proprietario, tipo, categoria, status FROM veiculos"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
+    """
+    Cadastro fixo, relido só quando 'veiculos' muda: a versão (diário de
+    alterações) é a chave do cache, então filtros e recargas da página não
+    tocam na tabela.
+    """
+    with pool_leitura().conexao() as conn:
+        versao = consultas.versao_veiculos(conn)
+    return _veiculos_na_versao(versao)
+
+@st.cache_data(max_entries=32)
+def _resumo_na_versao(versao, periodo, data_inicio, data_fim, status):
+    with pool_leitura().conexao() as conn:
+        return consultas.carregar_resumo(conn, periodo, data_inicio, data_fim, status)
+
+def carregar_resumo(periodo, data_inicio, data_fim, status=None):
+    """Resumos por hora/dia, em cache até entrar acesso novo."""
+    with pool_leitura().conexao() as conn:
+        versao = consultas.versao_resumos(conn)
+    return _resumo_na_versao(versao, periodo, data_inicio, data_fim, tuple(status) if status else None)
+
+@st.cache_data(max_entries=512)
+def miniatura_evidencia(chave):
+    """Miniatura como data URI (a tabela do Streamlit não lê arquivo local)."""
+    caminho = evidencias.caminho_evidencia(chave, "mini")
+    if not os.path.exists(caminho):
+        return None # Ainda sendo gravada ou descartada
+    with open(caminho, "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode("ascii")
 
 def limpar_banco_dados():
     conn = get_connection()
     cursor = conn.cursor()
     # Apaga os dados mas mantem as tabelas vivas
     cursor.execute("DELETE FROM acessos")
+    cursor.execute("DELETE FROM acessos_resumo") # Os ids de acessos não se repetem: o controle segue valendo
     cursor.execute("DELETE FROM veiculos")
     conn.commit()
     conn.close()
+    # Meses arquivados também fazem parte do histórico
+    for mes in arquivamento.meses_arquivados():
+        os.remove(arquivamento.caminho_mes(mes))
+    shutil.rmtree(evidencias.PASTA_EVIDENCIAS, ignore_errors=True)
 
 # --- BARRA LATERAL (MENU) ---
 menu = st.sidebar.radio(
     "Navegação", 
-    ["Monitoramento", "Relatórios de Acesso", "Base de Veículos", "Cadastrar Novo", "Área Admin"]
+    ["Monitoramento", "Relatórios de Acesso", "Estatísticas", "Base de Veículos", "Cadastrar Novo", "Área Admin"]
 )
 
 # --- 1. MONITORAMENTO ---
 if menu == "Monitoramento":
     st.subheader("Monitoramento de Entradas")
-    st.info("Aguardando novos acessos... (Atualização automática)")
+    # Reescrito a cada ping/consulta: toda chamada ao Streamlit numa sessão já
+    # fechada levanta exceção, e é isso que tira o loop abaixo (e a assinatura) do ar
+    aviso = st.empty()
+    aviso.info("Aguardando novos acessos... (Atualização automática)")
     
     placeholder = st.empty()
-    
-    # Loop de atualização (simulação de real-time)
-    while True:
-        df = carregar_acessos()
+
+    def mostrar(metricas, df):
         with placeholder.container():
             # Métricas no topo
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Total Acessos", len(df))
-            col2.metric("Carros", len(df[df['tipo'] == 'CARRO']))
-            col3.metric("Motos", len(df[df['tipo'] == 'MOTO']))
-            
+            col1.metric("Total Acessos", metricas["total"])
+            col2.metric("Carros", metricas["carros"])
+            col3.metric("Motos", metricas["motos"])
+
             # Pega o último acesso para destaque
             ultimo = df.iloc[0]['Horário Entrada'] if not df.empty else "--"
             col4.metric("Última Entrada", ultimo.split(' ')[-1] if len(ultimo) > 5 else "--")
 
             # Tabela
-            st.dataframe(df.head(15), use_container_width=True)
-            
-        time.sleep(2) # Atualiza a cada 2 segundos
+            st.dataframe(df, use_container_width=True)
+
+    # Carga inicial: métricas agregadas no SQL + só as últimas 15 linhas
+    with pool_leitura().conexao() as conn:
+        metricas = consultas.contar_acessos(conn)
+        df = consultas.carregar_acessos_recentes(conn, 15)
+    mostrar(metricas, df)
+
+    while True:
+        # Com a portaria no ar, as decisões chegam por push (servico_eventos.py):
+        # a página só acorda quando há acesso novo (ou no ping) e o banco não é consultado
+        recebeu_eventos = False
+        eventos = servico_eventos.assinar()
+        try:
+            for evento in eventos:
+                if evento is None:
+                    aviso.info(f"Aguardando novos acessos... (ao vivo, {time.strftime('%H:%M:%S')})")
+                    continue
+                if evento["status"] != "AUTORIZADO":
+                    continue
+                recebeu_eventos = True
+                df_novos = consultas.acesso_do_evento(evento)
+                metricas = consultas.somar_metricas(metricas, df_novos)
+                df = pd.concat([df_novos, df]).head(15)
+                mostrar(metricas, df)
+        except (OSError, ValueError):
+            pass # Serviço fora do ar (portaria parada) ou conexão caiu
+        finally:
+            eventos.close() # Fecha a conexão: o serviço descarta a fila deste assinante
+
+        with pool_leitura().conexao() as conn:
+            if recebeu_eventos:
+                # Os eventos não têm o id do banco: ressincroniza antes de voltar a consultar
+                metricas = consultas.contar_acessos(conn)
+                df = consultas.carregar_acessos_recentes(conn, 15)
+                df_novos = df
+            else:
+                # Sem push: busca só o que entrou depois do último id visto
+                df_novos = consultas.carregar_acessos_desde(conn, metricas["ultimo_id"])
+                if not df_novos.empty:
+                    metricas = consultas.somar_metricas(metricas, df_novos)
+                    df = pd.concat([df_novos, df]).head(15)
+        if not df_novos.empty:
+            mostrar(metricas, df)
+        aviso.info(f"Aguardando novos acessos... (consultando o banco, {time.strftime('%H:%M:%S')})")
+
+        time.sleep(2) # Tenta o push de novo a cada 2 segundos
 
 # --- 2. RELATÓRIOS ---
 elif menu == "Relatórios de Acesso":
     st.subheader("Histórico de Acessos")
-    df = carregar_acessos()
-    
+
     col1, col2 = st.columns(2)
     with col1:
-        filtro_placa = st.text_input("Buscar por Placa:")
+        filtro_placa = st.text_input("Buscar por Placa (início):")
     with col2:
-        filtro_tipo = st.multiselect("Filtrar Tipo", ["CARRO", "MOTO"], default=["CARRO", "MOTO"])
+        filtro_tipo = st.multiselect("Filtrar Tipo", TIPOS_VEICULO, default=TIPOS_VEICULO)
 
-    # Aplica filtros
-    if filtro_placa:
-        df = df[df['placa'].str.contains(filtro_placa.upper())]
-    
-    if filtro_tipo:
-        df = df[df['tipo'].isin(filtro_tipo)]
-        
-    st.dataframe(df, use_container_width=True)
-    
-    st.download_button(
-        label="Baixar Relatório (CSV)",
-        data=df.to_csv(index=False).encode('utf-8'),
-        file_name='relatorio_acessos.csv',
-        mime='text/csv',
-    )
+    col3, col4, col5 = st.columns(3)
+    with col3:
+        data_inicio = st.date_input("De", value=None)
+    with col4:
+        data_fim = st.date_input("Até", value=None)
+    with col5:
+        filtro_decisao = st.multiselect("Decisão", ["AUTORIZADO", "BLOQUEADO", "NAO CADASTRADO"],
+                                        default=["AUTORIZADO"])
+
+    # Os filtros vão para o SQL: o banco devolve só a página da tela
+    filtros = consultas.montar_filtros(filtro_placa, filtro_tipo, data_inicio, data_fim, filtro_decisao)
+    with pool_leitura().conexao() as conn:
+        total = consultas.contar_acessos_filtrados(conn, filtros)
+    total_paginas = max(1, -(-total // consultas.TAMANHO_PAGINA))
+
+    pagina = st.number_input(f"Página (de {total_paginas}) - {total} registros",
+                             min_value=1, max_value=total_paginas, value=1, step=1)
+    mostrar_evidencias = st.toggle("Mostrar evidências (imagens)")
+    with pool_leitura().conexao() as conn:
+        df = consultas.carregar_pagina_acessos(conn, filtros, int(pagina))
+        # Só os acessos desta página têm as imagens buscadas
+        chaves = consultas.carregar_evidencias(conn, filtros, df['id']) if mostrar_evidencias else {}
+
+    if mostrar_evidencias:
+        df.insert(0, "Evidência", [miniatura_evidencia(chaves[i]) if i in chaves else None for i in df['id']])
+        st.dataframe(df, use_container_width=True,
+                     column_config={"Evidência": st.column_config.ImageColumn("Evidência")})
+
+        com_imagem = [i for i in df['id'] if i in chaves]
+        if com_imagem:
+            escolhido = st.selectbox("Ver evidência do acesso (id):", com_imagem)
+            col_veiculo, col_placa = st.columns(2)
+            for coluna, parte, legenda in ((col_veiculo, "veiculo", "Veículo"), (col_placa, "placa", "Placa")):
+                caminho = evidencias.caminho_evidencia(chaves[escolhido], parte)
+                if os.path.exists(caminho):
+                    coluna.image(caminho, caption=legenda)
+    else:
+        st.dataframe(df, use_container_width=True)
+
+    # Exportação: lê o cursor em lotes direto para um arquivo temporário
+    if total > MAX_LINHAS_EXPORTACAO:
+        st.warning(f"Relatório grande demais para baixar pelo navegador ({total} registros, "
+                   f"máximo {MAX_LINHAS_EXPORTACAO}). Reduza o período ou gere pela linha de comando: "
+                   "`python dml.py acessos relatorio.csv --de AAAA-MM-DD --ate AAAA-MM-DD`")
+    elif st.button("Gerar Relatório (CSV)"):
+        anterior = st.session_state.get("arquivo_relatorio")
+        if anterior and os.path.exists(anterior):
+            os.remove(anterior)
+        os.makedirs(PASTA_RELATORIOS, exist_ok=True)
+        limpar_relatorios_antigos()
+        with tempfile.NamedTemporaryFile("w", newline="", encoding="utf-8", dir=PASTA_RELATORIOS,
+                                         suffix=".csv", delete=False) as arquivo, \
+                pool_leitura().conexao() as conn:
+            linhas = consultas.exportar_acessos_csv(conn, filtros, arquivo)
+        st.session_state["arquivo_relatorio"] = arquivo.name
+        st.success(f"{linhas} registros exportados.")
+
+    arquivo_relatorio = st.session_state.get("arquivo_relatorio")
+    if arquivo_relatorio and os.path.exists(arquivo_relatorio):
+        with open(arquivo_relatorio, "rb") as arquivo:
+            st.download_button(
+                label="Baixar Relatório (CSV)",
+                data=arquivo,
+                file_name='relatorio_acessos.csv',
+                mime='text/csv',
+            )
+
+# --- ESTATÍSTICAS (lidas dos resumos por hora/dia, não da tabela de acessos) ---
+elif menu == "Estatísticas":
+    st.subheader("Estatísticas de Acesso")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        data_inicio = st.date_input("De", value=pd.Timestamp.now().date() - pd.Timedelta(days=30))
+    with col2:
+        data_fim = st.date_input("Até", value=pd.Timestamp.now().date())
+
+    df_dia = carregar_resumo("dia", data_inicio, data_fim)
+    df_hora = carregar_resumo("hora", data_inicio, data_fim, ["AUTORIZADO"])
+
+    if df_dia.empty:
+        st.warning("Nenhum acesso no período.")
+    else:
+        autorizados = df_dia[df_dia['status'] == 'AUTORIZADO']
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Entradas", int(autorizados['total'].sum()))
+        col2.metric("Bloqueados", int(df_dia.loc[df_dia['status'] == 'BLOQUEADO', 'total'].sum()))
+        col3.metric("Não cadastrados", int(df_dia.loc[df_dia['status'] == 'NAO CADASTRADO', 'total'].sum()))
+
+        st.markdown("#### Acessos por dia")
+        st.line_chart(df_dia.pivot_table(index='inicio', columns='status', values='total', aggfunc='sum', fill_value=0))
+
+        st.markdown("#### Horário de pico (entradas por hora do dia)")
+        df_hora['hora'] = df_hora['inicio'].str[11:13]
+        st.bar_chart(df_hora.groupby('hora')['total'].sum())
+
+        st.markdown("#### Totais por mês")
+        autorizados = autorizados.assign(mes=autorizados['inicio'].str[:7])
+        st.dataframe(autorizados.pivot_table(index='mes', columns='tipo', values='total', aggfunc='sum',
+                                             fill_value=0, margins=True, margins_name='TOTAL'),
+                     use_container_width=True)
 
 # --- 3. BASE DE VEÍCULOS (NOVA SOLICITAÇÃO) ---
 elif menu == "Base de Veículos":
@@ -120,7 +306,7 @@ elif menu == "Base de Veículos":
         col1.info(f"Total de Veículos Cadastrados: {len(df_veiculos)}")
         
         # Filtro rápido
-        status_filter = col2.selectbox("Filtrar por Status", ["Todos", "AUTORIZADO", "BLOQUEADO"])
+        status_filter = col2.selectbox("Filtrar por Status", ["Todos", *STATUS_VEICULO])
         if status_filter != "Todos":
             df_veiculos = df_veiculos[df_veiculos['status'] == status_filter]
 
@@ -138,8 +324,8 @@ elif menu == "Cadastrar Novo":
             placa = st.text_input("Placa (Sem traços)")
             nome = st.text_input("Nome do Proprietário")
         with col_b:
-            tipo = st.selectbox("Tipo", ["CARRO", "MOTO"])
-            cat = st.selectbox("Categoria", ["OFICIAL", "PARTICULAR"])
+            tipo = st.selectbox("Tipo", TIPOS_VEICULO)
+            cat = st.selectbox("Categoria", CATEGORIAS_VEICULO)
         
         obs = st.text_area("Observação (Opcional)")
         
@@ -188,10 +374,52 @@ elif menu == "Área Admin":
         except Exception as e:
             st.error(f"Erro ao limpar banco: {e}")
 
+    st.divider()
+    st.markdown("### Arquivamento")
+    meses = arquivamento.meses_arquivados()
+    st.markdown(f"Acessos com mais de **{arquivamento.DIAS_RETENCAO} dias** saem do banco principal e "
+                f"ficam em arquivos mensais (`{arquivamento.PASTA_ARQUIVO}/`), ainda visíveis nos relatórios. "
+                f"Meses arquivados: {', '.join(meses) if meses else 'nenhum'}.")
+    if st.button("Arquivar acessos antigos agora"):
+        conn = get_connection()
+        movidos = arquivamento.arquivar_acessos(conn)
+        conn.close()
+        if movidos:
+            st.success(" | ".join(f"{mes}: {qtd} acessos" for mes, qtd in movidos.items()))
+        else:
+            st.info("Nada para arquivar.")
+
     st.divider()
     st.markdown("### Status do Sistema")
+    with pool_leitura().conexao() as conn:
+        valores, atualizado_em = consultas.carregar_metricas_sistema(conn)
+
+    # A portaria publica a cada poucos segundos; sem notícia há 30 s = parada
+    if atualizado_em is None:
+        status = "Sem dados (portaria nunca executou)"
+    elif (pd.Timestamp.now() - pd.Timestamp(atualizado_em)).total_seconds() > 30:
+        status = f"Parado (última atualização {atualizado_em})"
+    else:
+        status = "Operante"
+
     st.json({
         "Banco de Dados": "Conectado (Local)",
         "Arquivo": "sistema_campus.db",
-        "Status": "Operante"
-    })
\ No newline at end of file
+        "Status": status,
+    })
+
+    if valores:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("FPS Captura", valores.get("fps_captura", 0))
+        col2.metric("FPS Detecção", valores.get("fps_deteccao", 0))
+        col3.metric("OCR com sucesso", f"{valores.get('taxa_ocr_sucesso', 0):.0%}")
+        col4.metric("Resolvidos no banco", f"{valores.get('taxa_resolvido_banco', 0):.0%}")
+
+        col5, col6, col7, col8 = st.columns(4)
+        col5.metric("Frames descartados", f"{valores.get('taxa_frames_descartados', 0):.0%}")
+        col6.metric("YOLO p95 (ms)", valores.get("latencia_yolo_p95_ms", "--"))
+        col7.metric("OCR p95 (ms)", valores.get("latencia_ocr_p95_ms", "--"))
+        col8.metric("Decisões/min", valores.get("decisoes_por_minuto", 0))
+
+        with st.expander("Todas as métricas"):
+            st.json(valores)
\ No newline at end of file
@@ -0,0 +1,104 @@
+from indice_placas import formato_placa
+
+# Transforma os fragmentos lidos pelo EasyOCR na placa mais provável,
+# respeitando o formato brasileiro posição a posição:
+#   Antiga:   L L L N N N N   (ABC1234)
+#   Mercosul: L L L N L N N   (BRA2E19)
+# Onde o formato pede letra e o OCR leu dígito (ou o contrário), o caractere
+# é corrigido pelo seu "gêmeo" visual (0/O, 1/I, 8/B...), com uma penalidade.
+
+# --- CONFIGURAÇÕES ---
+ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"  # Passado ao EasyOCR: nada de pontuação/minúsculas
+LAYOUTS = {"ANTIGA": "LLLNNNN", "MERCOSUL": "LLLNLNN"}
+PENALIDADE_CORRECAO = 0.8   # Multiplica a confiança a cada letra/dígito corrigido
+PENALIDADE_SOBRA = 0.95     # Multiplica a confiança a cada caractere descartado da leitura
+CONFIANCA_MINIMA = 0.35     # Abaixo disso a leitura é tratada como falha
+CONFIANCA_SAIDA = 0.8       # A partir disso não tenta outras variações da imagem
+
+# Gêmeos visuais entre letras e dígitos
+LETRA_PARA_DIGITO = {"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "Z": "2",
+                     "A": "4", "S": "5", "G": "6", "T": "7", "B": "8"}
+DIGITO_PARA_LETRA = {"0": "O", "1": "I", "2": "Z", "4": "A", "5": "S", "6": "G", "7": "T", "8": "B"}
+
+def ajustar_ao_layout(texto, layout):
+    """
+    Força o texto (7 caracteres) no layout ('L' = letra, 'N' = dígito).
+    Retorna (placa, correcoes) ou None se algum caractere não tiver gêmeo.
+    """
+    placa = []
+    correcoes = 0
+    for c, tipo in zip(texto, layout):
+        if tipo == "L" and c.isdigit():
+            c = DIGITO_PARA_LETRA.get(c)
+            correcoes += 1
+        elif tipo == "N" and c.isalpha():
+            c = LETRA_PARA_DIGITO.get(c)
+            correcoes += 1
+        if c is None:
+            return None
+        placa.append(c)
+    return ''.join(placa), correcoes
+
+def ordenar_fragmentos(resultado):
+    """
+    Fragmentos do readtext [(caixa, texto, confianca), ...] em ordem de
+    leitura: linha de cima primeiro (placa de moto tem duas), depois da
+    esquerda para a direita. Devolve [(texto_limpo, confianca), ...].
+    """
+    fragmentos = []
+    for caixa, texto, confianca in resultado:
+        limpo = ''.join(c for c in texto if c.isalnum()).upper()
+        if not limpo:
+            continue
+        ys = [p[1] for p in caixa]
+        xs = [p[0] for p in caixa]
+        fragmentos.append((min(ys), max(ys), min(xs), limpo, float(confianca)))
+
+    # Mesma linha quando o topo de um fica acima do centro do outro
+    fragmentos.sort(key=lambda f: (f[0], f[2]))
+    linhas = []
+    for f in fragmentos:
+        if linhas and f[0] < (linhas[-1][0][0] + linhas[-1][0][1]) / 2:
+            linhas[-1].append(f)
+        else:
+            linhas.append([f])
+    return [(f[3], f[4]) for linha in linhas for f in sorted(linha, key=lambda f: f[2])]
+
+def candidatos(fragmentos):
+    """
+    Textos candidatos: cada sequência de fragmentos consecutivos concatenada
+    (junta 'BRA' + '2E19'), com a confiança média por caractere.
+    Gera (texto, confiancas_por_caractere).
+    """
+    for inicio in range(len(fragmentos)):
+        texto, confiancas = "", []
+        for limpo, confianca in fragmentos[inicio:]:
+            texto += limpo
+            # O EasyOCR só dá a confiança do fragmento: vale para cada caractere dele
+            confiancas += [confianca] * len(limpo)
+            if len(texto) >= 7:
+                yield texto, confiancas
+            if len(texto) > 10:
+                break
+
+def decodificar(resultado):
+    """
+    Melhor placa válida entre os fragmentos do EasyOCR.
+    Retorna (placa, confianca) ou (None, 0.0).
+    """
+    melhor, melhor_confianca = None, 0.0
+    for texto, confiancas in candidatos(ordenar_fragmentos(resultado)):
+        sobra = len(texto) - 7
+        # Janelas de 7 caracteres (a sujeira pode estar antes ou depois)
+        for i in range(sobra + 1):
+            janela = texto[i:i + 7]
+            base = sum(confiancas[i:i + 7]) / 7.0 * PENALIDADE_SOBRA ** sobra
+            for layout in LAYOUTS.values():
+                ajuste = ajustar_ao_layout(janela, layout)
+                if ajuste is None:
+                    continue
+                placa, correcoes = ajuste
+                confianca = base * PENALIDADE_CORRECAO ** correcoes
+                if confianca > melhor_confianca and formato_placa(placa):
+                    melhor, melhor_confianca = placa, confianca
+    return melhor, melhor_confianca
@@ -0,0 +1,199 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Backends do detector de veículos. Todos recebem frames BGR e devolvem, por
+# frame, [((x1, y1, x2, y2), tipo), ...] só com as classes de veículo.
+#   pytorch   -> Ultralytics padrão (usa GPU se houver)
+#   onnx      -> modelo exportado para ONNX, rodando no onnxruntime (CPU)
+#   onnx-int8 -> o mesmo ONNX com pesos quantizados em INT8
+#   auto      -> mede os disponíveis na máquina e fica com o mais rápido
+
+# --- CONFIGURAÇÕES ---
+MODELO_YOLO = 'yolov8n.pt'
+BACKEND = os.environ.get("DETECTOR_BACKEND", "auto")
+TAMANHO_ENTRADA = int(os.environ.get("DETECTOR_IMGSZ", "640"))  # Resolução da inferência (múltiplo de 32)
+ARQUIVO_ESCOLHA = "detector_escolhido.json"   # Resultado do 'auto' (evita medir a cada partida)
+REPETICOES_ESCOLHA = 10
+LIMIAR_NMS = 0.45
+
+# Classes do COCO que interessam: 2=Carro, 3=Moto, 5=Onibus, 7=Caminhao
+CLASSES_VEICULO = {2: "CARRO", 3: "MOTO", 5: "ONIBUS", 7: "CAMINHAO"}
+
+class DetectorPyTorch:
+    """YOLO pelo caminho normal do Ultralytics, filtrando as classes na própria inferência."""
+    nome = "pytorch"
+
+    def __init__(self, tamanho=TAMANHO_ENTRADA):
+        from ultralytics import YOLO
+        self.tamanho = tamanho
+        self.model = YOLO(MODELO_YOLO)
+
+    def detectar(self, frames, conf):
+        results = self.model(frames, stream=True, verbose=False, conf=conf,
+                             imgsz=self.tamanho, classes=list(CLASSES_VEICULO))
+        por_frame = []
+        for r in results:
+            deteccoes = []
+            for box in r.boxes:
+                tipo = CLASSES_VEICULO.get(int(box.cls[0]))
+                if tipo:
+                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    deteccoes.append(((x1, y1, x2, y2), tipo))
+            por_frame.append(deteccoes)
+        return por_frame
+
+class DetectorOnnx:
+    """
+    YOLO exportado para ONNX e executado no onnxruntime (CPU). Pré e
+    pós-processamento (letterbox, filtro de classes e NMS) feitos aqui, sem
+    carregar o PyTorch na inferência.
+    """
+    nome = "onnx"
+
+    def __init__(self, tamanho=TAMANHO_ENTRADA, quantizado=False):
+        import onnxruntime as ort
+        self.tamanho = tamanho
+        if quantizado:
+            self.nome = "onnx-int8"
+        caminho = caminho_onnx(tamanho, quantizado)
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.sessao = ort.InferenceSession(caminho, opcoes, providers=["CPUExecutionProvider"])
+        self.entrada = self.sessao.get_inputs()[0].name
+        self.ids_classes = np.array(sorted(CLASSES_VEICULO))
+
+    def _preparar(self, frame):
+        """Letterbox: redimensiona mantendo a proporção e completa com cinza."""
+        h, w = frame.shape[:2]
+        escala = min(self.tamanho / w, self.tamanho / h)
+        nw, nh = int(round(w * escala)), int(round(h * escala))
+        dx, dy = (self.tamanho - nw) // 2, (self.tamanho - nh) // 2
+
+        tela = np.full((self.tamanho, self.tamanho, 3), 114, dtype=np.uint8)
+        tela[dy:dy + nh, dx:dx + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        blob = cv2.dnn.blobFromImage(tela, 1 / 255.0, swapRB=True)
+        return blob, escala, dx, dy, w, h
+
+    def detectar(self, frames, conf):
+        preparados = [self._preparar(f) for f in frames]
+        lote = np.concatenate([p[0] for p in preparados])
+        saida = self.sessao.run(None, {self.entrada: lote})[0]   # (lote, 4 + 80, N)
+
+        por_frame = []
+        for pred, (_, escala, dx, dy, w, h) in zip(saida, preparados):
+            pred = pred.T
+            # Só as colunas das classes de veículo entram na disputa
+            pontuacoes = pred[:, 4 + self.ids_classes]
+            melhor = pontuacoes.argmax(axis=1)
+            confianca = pontuacoes[np.arange(len(pred)), melhor]
+            manter = confianca >= conf
+            if not manter.any():
+                por_frame.append([])
+                continue
+
+            cx, cy, bw, bh = pred[manter, :4].T
+            caixas = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+            confianca, melhor = confianca[manter], melhor[manter]
+            indices = cv2.dnn.NMSBoxesBatched(caixas.tolist(), confianca.tolist(), melhor.tolist(),
+                                              conf, LIMIAR_NMS)
+
+            deteccoes = []
+            for i in np.array(indices).flatten():
+                x, y, bw_i, bh_i = caixas[i]
+                x1 = int(max(0, (x - dx) / escala))
+                y1 = int(max(0, (y - dy) / escala))
+                x2 = int(min(w, (x + bw_i - dx) / escala))
+                y2 = int(min(h, (y + bh_i - dy) / escala))
+                deteccoes.append(((x1, y1, x2, y2), CLASSES_VEICULO[int(self.ids_classes[melhor[i]])]))
+            por_frame.append(deteccoes)
+        return por_frame
+
+def caminho_onnx(tamanho=TAMANHO_ENTRADA, quantizado=False):
+    """Exporta (uma vez) o modelo para ONNX e, se pedido, quantiza. Devolve o arquivo."""
+    base = os.path.splitext(MODELO_YOLO)[0]
+    arquivo = f"{base}_{tamanho}.onnx"
+    if not os.path.exists(arquivo):
+        from ultralytics import YOLO
+        print(f">>> Exportando {MODELO_YOLO} para ONNX ({tamanho}px)...")
+        exportado = YOLO(MODELO_YOLO).export(format="onnx", imgsz=tamanho, dynamic=True, simplify=True)
+        os.replace(exportado, arquivo)
+
+    if not quantizado:
+        return arquivo
+
+    arquivo_int8 = f"{base}_{tamanho}_int8.onnx"
+    if not os.path.exists(arquivo_int8):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(">>> Quantizando o modelo ONNX (INT8)...")
+        quantize_dynamic(arquivo, arquivo_int8, weight_type=QuantType.QUInt8)
+    return arquivo_int8
+
+BACKENDS = {
+    "pytorch": DetectorPyTorch,
+    "onnx": DetectorOnnx,
+    "onnx-int8": lambda tamanho: DetectorOnnx(tamanho, quantizado=True),
+}
+
+def medir_detector(detector, frames, repeticoes=REPETICOES_ESCOLHA):
+    """Mediana (ms) de uma inferência de um frame, depois do aquecimento."""
+    detector.detectar(frames[:1], 0.5)
+    tempos = []
+    for i in range(repeticoes):
+        t0 = time.perf_counter()
+        detector.detectar([frames[i % len(frames)]], 0.5)
+        tempos.append((time.perf_counter() - t0) * 1000.0)
+    return float(np.median(tempos))
+
+def escolher_detector(tamanho=TAMANHO_ENTRADA, frames=None):
+    """
+    Mede cada backend disponível nesta máquina e devolve o mais rápido.
+    A escolha fica salva em ARQUIVO_ESCOLHA; apague o arquivo para medir de novo.
+    """
+    if os.path.exists(ARQUIVO_ESCOLHA):
+        with open(ARQUIVO_ESCOLHA, encoding="utf-8") as f:
+            escolha = json.load(f)
+        if escolha.get("tamanho") == tamanho and escolha.get("backend") in BACKENDS:
+            try:
+                return BACKENDS[escolha["backend"]](tamanho)
+            except Exception as e:
+                print(f">>> Backend salvo '{escolha['backend']}' indisponível ({e}), medindo de novo...")
+
+    if frames is None:
+        rnd = np.random.default_rng(0)
+        frames = [rnd.integers(0, 255, (600, 800, 3), dtype=np.uint8) for _ in range(3)]
+
+    melhor, tempos = None, {}
+    for nome, criar in BACKENDS.items():
+        try:
+            detector = criar(tamanho)
+            tempos[nome] = medir_detector(detector, frames)
+        except Exception as e:
+            print(f">>> Detector '{nome}' indisponível: {e}")
+            continue
+        print(f">>> Detector '{nome}': {tempos[nome]:.1f} ms/frame")
+        if melhor is None or tempos[nome] < tempos[melhor.nome]:
+            melhor = detector
+
+    if melhor is None:
+        raise RuntimeError("Nenhum backend de detecção disponível")
+
+    print(f">>> Usando o detector '{melhor.nome}'")
+    with open(ARQUIVO_ESCOLHA, "w", encoding="utf-8") as f:
+        json.dump({"backend": melhor.nome, "tamanho": tamanho, "tempos_ms": tempos}, f, indent=2)
+    return melhor
+
+def aquecer(detector, largura=800, altura=600):
+    """Uma inferência descartada: aloca buffers e compila kernels antes do primeiro veículo."""
+    detector.detectar([np.zeros((altura, largura, 3), dtype=np.uint8)], 0.5)
+
+def carregar_detector(backend=BACKEND, tamanho=TAMANHO_ENTRADA):
+    if backend == "auto":
+        return escolher_detector(tamanho)
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de detecção desconhecido: {backend} (opções: auto, {', '.join(BACKENDS)})")
+    return BACKENDS[backend](tamanho)
@@ -1,4 +1,11 @@
+import argparse
+import time
+from datetime import date
+
 from banco_dados import BancoDeDados
+from carga_veiculos import ler_veiculos, exportar_veiculos
+
+MAX_ERROS_EXIBIDOS = 20
 
 def popular_banco():
     db = BancoDeDados()
@@ -33,33 +40,76 @@ def popular_banco():
     ]
 
     print(f"Iniciando carga de {len(dados_mock)} registros...")
-    
-    sucessos = 0
-    erros = 0
 
-    for item in dados_mock:
-        # Desempacota os dados da tupla
-        placa, nome, tipo, cat, status = item
-        
-        # Chama a função de cadastro
-        resultado = db.cadastrar_veiculo(
-            placa=placa,
-            proprietario=nome,
-            tipo=tipo,
-            categoria=cat,
-            status=status
-        )
+    # Só insere: placa que já existe fica como está (não desfaz edições feitas no dashboard)
+    contar = "SELECT COUNT(*) FROM veiculos"
+    with db.conn:
+        antes = db.conn.execute(contar).fetchone()[0]
+        db.conn.executemany("""
+            INSERT OR IGNORE INTO veiculos (placa, proprietario, tipo, categoria, status)
+            VALUES (?, ?, ?, ?, ?)
+        """, dados_mock)
+        inseridos = db.conn.execute(contar).fetchone()[0] - antes
 
-        if resultado:
-            print(f"[OK] {placa} - {nome}")
-            sucessos += 1
-        else:
-            print(f"[X]  {placa} já existe no banco.")
-            erros += 1
+    db.fechar()
+    print("-" * 30)
+    print(f"Concluído! Inseridos: {inseridos} | Já existiam: {len(dados_mock) - inseridos}")
 
+def importar(arquivo):
+    """Importa (ou atualiza) veículos de um CSV/JSONL numa transação só."""
+    db = BancoDeDados()
+    inicio = time.perf_counter()
+    resultado = db.importar_veiculos(ler_veiculos(arquivo))
+    duracao = time.perf_counter() - inicio
     db.fechar()
+
+    for numero, motivo in resultado["erros"][:MAX_ERROS_EXIBIDOS]:
+        print(f"[X]  Registro {numero}: {motivo}")
+    if len(resultado["erros"]) > MAX_ERROS_EXIBIDOS:
+        print(f"... e mais {len(resultado['erros']) - MAX_ERROS_EXIBIDOS} registros rejeitados")
     print("-" * 30)
-    print(f"Concluído! Inseridos: {sucessos} | Duplicados: {erros}")
+    print(f"Concluído em {duracao:.1f}s! Inseridos: {resultado['inseridos']} | "
+          f"Atualizados: {resultado['atualizados']} | Inalterados: {resultado['inalterados']} | "
+          f"Rejeitados: {resultado['rejeitados']}")
+
+def exportar(arquivo):
+    db = BancoDeDados()
+    total = exportar_veiculos(db.conn, arquivo)
+    db.fechar()
+    print(f"{total} veículos exportados para {arquivo}")
+
+def exportar_acessos(arquivo, placa=None, data_inicio=None, data_fim=None, decisoes=None):
+    """Relatório de acessos em CSV (inclui os meses arquivados), sem limite de tamanho."""
+    import consultas # pandas só é preciso para este comando
+
+    db = BancoDeDados()
+    filtros = consultas.montar_filtros(placa, None, data_inicio, data_fim, decisoes)
+    with open(arquivo, "w", newline="", encoding="utf-8") as f:
+        total = consultas.exportar_acessos_csv(db.conn, filtros, f)
+    db.fechar()
+    print(f"{total} acessos exportados para {arquivo}")
 
 if __name__ == "__main__":
-    popular_banco()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Carga de veículos no banco.")
+    comandos = parser.add_subparsers(dest="comando")
+    comandos.add_parser("mock", help="Cadastra os veículos de exemplo (padrão)")
+    comando_importar = comandos.add_parser("importar", help="Importa um arquivo CSV ou JSONL")
+    comando_importar.add_argument("arquivo")
+    comando_exportar = comandos.add_parser("exportar", help="Exporta os veículos para CSV ou JSONL")
+    comando_exportar.add_argument("arquivo")
+    comando_acessos = comandos.add_parser("acessos", help="Exporta o relatório de acessos para CSV")
+    comando_acessos.add_argument("arquivo")
+    comando_acessos.add_argument("--placa", help="Início da placa")
+    comando_acessos.add_argument("--de", type=date.fromisoformat, help="AAAA-MM-DD")
+    comando_acessos.add_argument("--ate", type=date.fromisoformat, help="AAAA-MM-DD (inclusive)")
+    comando_acessos.add_argument("--decisao", nargs="+", choices=["AUTORIZADO", "BLOQUEADO", "NAO CADASTRADO"])
+    args = parser.parse_args()
+
+    if args.comando == "importar":
+        importar(args.arquivo)
+    elif args.comando == "exportar":
+        exportar(args.arquivo)
+    elif args.comando == "acessos":
+        exportar_acessos(args.arquivo, args.placa, args.de, args.ate, args.decisao)
+    else:
+        popular_banco()
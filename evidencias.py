@@ -0,0 +1,85 @@
+"""
+Evidências das decisões: recorte do veículo, recorte da placa e uma
+miniatura, em JPEG, numa pasta por dia (evidencias/2026/03/01/...). A
+portaria só entrega as imagens; a codificação e a escrita em disco rodam num
+pool de threads próprio. Se o disco não der conta, as evidências excedentes
+são descartadas (a portaria nunca espera).
+
+Cada acesso guarda em 'acessos.evidencia' a chave dos arquivos, ex.:
+'2026/03/01/071502_418_ABC1234'. Os arquivos são <chave>_veiculo.jpg,
+<chave>_placa.jpg e <chave>_mini.jpg.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import cv2
+
+# --- CONFIGURAÇÕES ---
+PASTA_EVIDENCIAS = os.environ.get("EVIDENCIAS_PASTA", "evidencias")
+THREADS_GRAVACAO = 2
+MAX_PENDENTES = 32          # Evidências na fila de gravação (limita a memória)
+QUALIDADE_JPEG = 85
+QUALIDADE_MINIATURA = 70
+LARGURA_MINIATURA = 160
+
+SUFIXOS = {"veiculo": "_veiculo.jpg", "placa": "_placa.jpg", "mini": "_mini.jpg"}
+
+def caminho_evidencia(chave, parte="mini", pasta=PASTA_EVIDENCIAS):
+    """Arquivo de uma parte da evidência ('veiculo', 'placa' ou 'mini')."""
+    return os.path.join(pasta, chave + SUFIXOS[parte])
+
+class GravadorEvidencias:
+    """Pool de gravação das evidências, com limite de pendentes."""
+
+    def __init__(self, pasta=PASTA_EVIDENCIAS, threads=THREADS_GRAVACAO, max_pendentes=MAX_PENDENTES):
+        self.pasta = pasta
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="evidencias")
+        self.gravadas = 0
+        self.descartadas = 0
+
+    def salvar(self, placa, instante, roi_veiculo, recorte_placa=None):
+        """
+        Agenda a gravação e devolve a chave da evidência na hora (ou None se a
+        fila estiver cheia). Não codifica nem escreve nada nesta thread.
+        """
+        if roi_veiculo is None or not roi_veiculo.size:
+            return None
+        if not self._vagas.acquire(blocking=False):
+            self.descartadas += 1
+            return None
+
+        momento = datetime.fromtimestamp(instante)
+        chave = f"{momento:%Y/%m/%d/%H%M%S}_{momento.microsecond // 1000:03d}_{placa}"
+        # Cópias pequenas: soltam o frame inteiro, que a captura já vai substituir
+        roi_veiculo = roi_veiculo.copy()
+        recorte_placa = None if recorte_placa is None else recorte_placa.copy()
+        self._executor.submit(self._gravar, chave, roi_veiculo, recorte_placa)
+        return chave
+
+    def _gravar(self, chave, roi_veiculo, recorte_placa):
+        try:
+            os.makedirs(os.path.dirname(caminho_evidencia(chave, pasta=self.pasta)), exist_ok=True)
+
+            altura = max(1, roi_veiculo.shape[0] * LARGURA_MINIATURA // roi_veiculo.shape[1])
+            miniatura = cv2.resize(roi_veiculo, (LARGURA_MINIATURA, altura), interpolation=cv2.INTER_AREA)
+
+            partes = [("veiculo", roi_veiculo, QUALIDADE_JPEG), ("mini", miniatura, QUALIDADE_MINIATURA)]
+            if recorte_placa is not None and recorte_placa.size:
+                partes.append(("placa", recorte_placa, QUALIDADE_JPEG))
+            for parte, imagem, qualidade in partes:
+                ok, jpeg = cv2.imencode(".jpg", imagem, [cv2.IMWRITE_JPEG_QUALITY, qualidade])
+                if ok:
+                    with open(caminho_evidencia(chave, parte, self.pasta), "wb") as f:
+                        f.write(jpeg.tobytes())
+            self.gravadas += 1
+        except OSError as e:
+            print(f"[evidencias] Falha ao gravar {chave}: {e}")
+        finally:
+            self._vagas.release()
+
+    def fechar(self):
+        """Espera as gravações pendentes terminarem."""
+        self._executor.shutdown(wait=True)
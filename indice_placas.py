@@ -0,0 +1,141 @@
+import re
+
+# --- FORMATOS ---
+# Antiga: LLLNNNN (ex.: ABC1234)   Mercosul: LLLNLNN (ex.: BRA2E19)
+FORMATO_ANTIGO = re.compile(r'^[A-Z]{3}[0-9]{4}$')
+FORMATO_MERCOSUL = re.compile(r'^[A-Z]{3}[0-9][A-Z][0-9]{2}$')
+
+# --- CONFUSÕES DO OCR ---
+# Caracteres que o OCR costuma trocar entre si. Trocar dentro do mesmo grupo
+# custa pouco; qualquer outra troca custa uma substituição inteira.
+GRUPOS_CONFUSAO = ["0OQD", "1IL", "2Z", "4A", "5S", "6G", "7T", "8B"]
+CUSTO_CONFUSAO = 0.25
+CUSTO_TROCA = 1.0
+# Placa antiga convertida para Mercosul (5º caractere 0-9 vira A-J)
+CUSTO_CONVERSAO_MERCOSUL = 0.1
+# Acima disso a leitura não é associada a nenhuma placa cadastrada
+DISTANCIA_MAXIMA = 1.25
+
+_CANONICO = {c: grupo[0] for grupo in GRUPOS_CONFUSAO for c in grupo}
+_ALFABETO = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+ALFABETO_CANONICO = sorted(set(_CANONICO.get(c, c) for c in _ALFABETO))
+
+def formato_placa(placa):
+    """'ANTIGA', 'MERCOSUL' ou None se o texto não for uma placa válida."""
+    if FORMATO_ANTIGO.match(placa):
+        return "ANTIGA"
+    if FORMATO_MERCOSUL.match(placa):
+        return "MERCOSUL"
+    return None
+
+def converter_formato(placa):
+    """
+    Equivalente da placa no outro padrão (ABC1234 <-> ABC1C34), ou None.
+    Carros antigos que trocaram para a placa Mercosul mantêm o cadastro antigo.
+    """
+    formato = formato_placa(placa)
+    if formato == "ANTIGA":
+        return placa[:4] + chr(ord('A') + int(placa[4])) + placa[5:]
+    if formato == "MERCOSUL" and placa[4] <= 'J':
+        return placa[:4] + str(ord(placa[4]) - ord('A')) + placa[5:]
+    return None
+
+def chave_confusao(placa):
+    """Troca cada caractere pelo representante do seu grupo de confusão."""
+    return ''.join(_CANONICO.get(c, c) for c in placa)
+
+def custo_caractere(a, b):
+    if a == b:
+        return 0.0
+    if _CANONICO.get(a, a) == _CANONICO.get(b, b):
+        return CUSTO_CONFUSAO
+    return CUSTO_TROCA
+
+def distancia_placas(lida, cadastrada):
+    """Distância de edição ponderada pelas confusões (mesmo tamanho, só substituições)."""
+    if len(lida) != len(cadastrada):
+        return float("inf")
+    return sum(custo_caractere(a, b) for a, b in zip(lida, cadastrada))
+
+class IndicePlacas:
+    """
+    Índice para achar a placa cadastrada mais próxima de uma leitura do OCR.
+
+    Cada placa (e a sua forma convertida Antiga/Mercosul) é guardada pela sua
+    chave de confusão. Uma busca olha a chave exata da leitura e as ~200
+    variações com um caractere trocado, então custa poucas consultas de
+    dicionário, independente do tamanho da base.
+    """
+
+    def __init__(self, placas=()):
+        self._chaves = {}   # chave de confusão -> tupla de (forma, placa cadastrada)
+        self._formas = {}   # placa cadastrada -> formas indexadas
+        for placa in placas:
+            self.adicionar(placa)
+
+    def __len__(self):
+        return len(self._formas)
+
+    def __contains__(self, placa):
+        return placa in self._formas
+
+    def adicionar(self, placa):
+        placa = placa.upper()
+        if placa in self._formas:
+            return
+        formas = [placa]
+        convertida = converter_formato(placa)
+        if convertida:
+            formas.append(convertida)
+        for forma in formas:
+            chave = chave_confusao(forma)
+            # Tuplas são trocadas inteiras: leitores em outra thread nunca veem meia alteração
+            self._chaves[chave] = self._chaves.get(chave, ()) + ((forma, placa),)
+        self._formas[placa] = formas
+
+    def remover(self, placa):
+        placa = placa.upper()
+        for forma in self._formas.pop(placa, ()):
+            chave = chave_confusao(forma)
+            restantes = tuple(e for e in self._chaves.get(chave, ()) if e[1] != placa)
+            if restantes:
+                self._chaves[chave] = restantes
+            else:
+                self._chaves.pop(chave, None)
+
+    def _candidatos(self, chave):
+        yield from self._chaves.get(chave, ())
+        # Um caractere qualquer errado (fora dos grupos de confusão)
+        for i, original in enumerate(chave):
+            prefixo, sufixo = chave[:i], chave[i + 1:]
+            for c in ALFABETO_CANONICO:
+                if c != original:
+                    yield from self._chaves.get(prefixo + c + sufixo, ())
+
+    def buscar(self, lida, distancia_maxima=DISTANCIA_MAXIMA):
+        """
+        Retorna (placa_cadastrada, confianca) da melhor correspondência, ou
+        (None, 0.0). Confiança 1.0 = leitura idêntica; cai com a distância e
+        quando há outra placa cadastrada quase tão próxima (ambiguidade).
+        """
+        lida = ''.join(c for c in lida.upper() if c.isalnum())
+        if len(lida) != 7:
+            return None, 0.0
+
+        melhores = {}
+        for forma, placa in self._candidatos(chave_confusao(lida)):
+            d = distancia_placas(lida, forma)
+            if forma != placa:
+                d += CUSTO_CONVERSAO_MERCOSUL
+            if d <= distancia_maxima and d < melhores.get(placa, float("inf")):
+                melhores[placa] = d
+
+        if not melhores:
+            return None, 0.0
+
+        ordenados = sorted(melhores.items(), key=lambda item: item[1])
+        placa, d = ordenados[0]
+        confianca = 1.0 - d / (distancia_maxima + CUSTO_CONFUSAO)
+        if len(ordenados) > 1 and ordenados[1][1] - d < CUSTO_CONFUSAO:
+            confianca /= 2 # Outra placa quase tão parecida: não dá para ter certeza
+        return placa, round(confianca, 3)
@@ -0,0 +1,93 @@
+import cv2
+import numpy as np
+
+# --- CONFIGURAÇÕES ---
+# Placa de carro: 40x13 cm (~3.1:1). Placa de moto Mercosul: 20x17 cm (~1.2:1).
+PROPORCAO_MIN = 1.0
+PROPORCAO_MAX = 6.0
+AREA_MIN = 0.003              # Fração mínima da área do veículo
+AREA_MAX = 0.25               # Fração máxima da área do veículo
+MAX_PLACAS = 3                # Candidatos enviados ao OCR por veículo
+LARGURA_NORMALIZADA = 240     # Largura do recorte entregue ao OCR
+MARGEM = 0.08                 # Folga em volta da caixa (não cortar a borda dos caracteres)
+
+def localizar_placas(roi_veiculo, max_placas=MAX_PLACAS):
+    """
+    Procura regiões com cara de placa dentro do recorte do veículo
+    (muito contraste horizontal, formato retangular). Retorna as caixas
+    [(x1, y1, x2, y2), ...] da mais para a menos provável.
+    """
+    h, w = roi_veiculo.shape[:2]
+    if h < 10 or w < 10:
+        return []
+
+    gray = cv2.cvtColor(roi_veiculo, cv2.COLOR_BGR2GRAY)
+
+    # Black-hat realça caracteres escuros sobre fundo claro (a placa)
+    # Kernel proporcional ao tamanho do veículo (placa ocupa ~1/4 da largura)
+    kx = max(9, int(w * 0.04))
+    kernel_rect = cv2.getStructuringElement(cv2.MORPH_RECT, (kx, max(3, kx // 3)))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel_rect)
+
+    # Gradiente horizontal: a sequência de caracteres gera muitas bordas verticais
+    grad = cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=3)
+    grad = np.absolute(grad)
+    grad = cv2.normalize(grad, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+    # Junta os caracteres num bloco só e binariza
+    grad = cv2.GaussianBlur(grad, (5, 5), 0)
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, kernel_rect)
+    _, binaria = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    binaria = cv2.erode(binaria, None, iterations=1)
+    binaria = cv2.dilate(binaria, None, iterations=2)
+
+    contornos, _ = cv2.findContours(binaria, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    area_roi = float(h * w)
+    candidatos = []
+    for c in contornos:
+        x, y, cw, ch = cv2.boundingRect(c)
+        if ch == 0:
+            continue
+        proporcao = cw / float(ch)
+        area = (cw * ch) / area_roi
+        if not (PROPORCAO_MIN <= proporcao <= PROPORCAO_MAX and AREA_MIN <= area <= AREA_MAX):
+            continue
+
+        # Quanto do retângulo o contorno preenche (placa é um bloco cheio)
+        preenchimento = cv2.contourArea(c) / float(cw * ch)
+        # Placas ficam na metade de baixo do veículo
+        posicao = (y + ch / 2) / h
+        score = preenchimento + 0.5 * posicao
+        candidatos.append((score, (x, y, x + cw, y + ch)))
+
+    candidatos.sort(key=lambda item: item[0], reverse=True)
+    return [caixa for _, caixa in candidatos[:max_placas]]
+
+def normalizar_recorte(roi_veiculo, caixa):
+    """Recorta a placa com uma folga e redimensiona para a largura padrão do OCR."""
+    h, w = roi_veiculo.shape[:2]
+    x1, y1, x2, y2 = caixa
+    mx = int((x2 - x1) * MARGEM)
+    my = int((y2 - y1) * MARGEM)
+    recorte = roi_veiculo[max(0, y1 - my):min(h, y2 + my), max(0, x1 - mx):min(w, x2 + mx)]
+
+    escala = LARGURA_NORMALIZADA / float(recorte.shape[1])
+    altura = max(1, int(round(recorte.shape[0] * escala)))
+    interpolacao = cv2.INTER_CUBIC if escala > 1 else cv2.INTER_AREA
+    return cv2.resize(recorte, (LARGURA_NORMALIZADA, altura), interpolation=interpolacao)
+
+def recortes_para_ocr(roi_veiculo, max_placas=MAX_PLACAS):
+    """
+    Recortes pequenos e normalizados que vão para o OCR, em ordem de prioridade.
+    Se nenhuma região de placa for achada, manda só a metade de baixo do
+    veículo reduzida (ainda bem menor que o veículo inteiro).
+    """
+    caixas = localizar_placas(roi_veiculo, max_placas)
+    if caixas:
+        return [normalizar_recorte(roi_veiculo, caixa) for caixa in caixas]
+
+    h, w = roi_veiculo.shape[:2]
+    if h < 10 or w < 10:
+        return []
+    return [normalizar_recorte(roi_veiculo, (0, h // 2, w, h))]
@@ -1,225 +1,445 @@
 import cv2
+import os
+import json
+import queue
+import threading
 import time
-import easyocr
-import numpy as np
-from ultralytics import YOLO
-from banco_dados import BancoDeDados 
+from concurrent.futures import ThreadPoolExecutor
+from detector import aquecer as aquecer_detector
+from banco_dados import BancoDeDados, ARQUIVO_BANCO
+from painel import PainelOperador, FPS_TELA
+from metricas import Metricas, PublicadorMetricas
+from servico_ocr import ServicoOCR
+from evidencias import GravadorEvidencias
+from servico_eventos import ServicoEventos
+from rastreador import RastreadorVeiculos
+from localizador_placa import recortes_para_ocr
+from movimento import DetectorMovimento, REGIAO_FAIXA
+from reconhecimento import carregar_detector, detectar_veiculos_lote, recortar, decidir_acesso
 
 # --- CONFIGURAÇÕES GERAIS ---
-LARGURA_TELA = 1280
-ALTURA_TELA = 720
-COR_FUNDO = (30, 30, 30)
-COR_PAINEL = (50, 50, 50)
-COR_TEXTO = (200, 200, 200)
-VERDE = (0, 255, 0)
-VERMELHO = (0, 0, 255)
-AZUL = (255, 0, 0)
-AMARELO = (0, 255, 255)
+TITULO_JANELA = "Sistema de Controle de Acesso - IF Machado"
+
+# Câmeras/faixas da portaria. Sem o arquivo, usa só a webcam 0. Exemplo:
+# [{"nome": "entrada-1", "fonte": 0},
+#  {"nome": "saida-1", "fonte": "rtsp://10.0.0.12/stream", "regiao": [[0.2, 0.3], [0.8, 0.3], [0.9, 1], [0.1, 1]]}]
+ARQUIVO_CAMERAS = os.environ.get("CAMERAS_CONFIG", "cameras.json")
+
+# Criado quando a portaria já lê placas (modelos carregados e aquecidos,
+# câmeras abertas); o start.py espera por ele. Apagado ao encerrar.
+ARQUIVO_PRONTO = os.environ.get("PORTARIA_PRONTA", "portaria.pronta")
 
 # --- INICIALIZAÇÃO ---
-print(">>> Inicializando Banco de Dados...")
-db = BancoDeDados()
-
-print(">>> Carregando IA (YOLO)...")
-model = YOLO('yolov8n.pt') 
-
-print(">>> Carregando Leitor de Placas (OCR)...")
-reader = easyocr.Reader(['pt'], gpu=False) # Mude gpu=True se tiver placa de vídeo NVIDIA
-
-cap = cv2.VideoCapture(0)
-
-# Variáveis de Controle
-tempo_ref = time.time()
-tempo_espera_ocr = 2.0  
-info_veiculo_db = None 
-placa_lida_texto = "--"
-tipo_veiculo_visual = "--"
-ultimo_acesso_status = "AGUARDANDO"
-
-def criar_interface_base():
-    """Cria o canvas preto HD para desenharmos em cima"""
-    img = np.zeros((ALTURA_TELA, LARGURA_TELA, 3), dtype=np.uint8)
-    img[:] = COR_FUNDO
-    # Desenha a área do painel lateral
-    cv2.rectangle(img, (800, 0), (LARGURA_TELA, ALTURA_TELA), COR_PAINEL, -1)
-    return img
-
-def processar_ocr_inteligente(img_recorte):
+# Preenchidos em inicializar(). Nada é carregado na importação, porque os
+# processos de OCR (spawn) reimportam este módulo.
+model = None
+servico_ocr = None
+faixas = []
+gravador_evidencias = None
+banco = None
+eventos = None  # Decisões publicadas na hora para o dashboard e outras integrações (SSE)
+
+# --- PIPELINE ---
+# Cada câmera tem sua thread de captura e o seu estado (faixa). Detecção, OCR
+# e decisão são compartilhados: o YOLO roda uma vez só com os frames de todas
+# as faixas (lote) e os resultados voltam para a faixa de origem. As filas são
+# pequenas e descartam o item antigo: ninguém processa frame velho e um OCR
+# lento não trava o vídeo.
+TAMANHO_FILA = 1
+
+fila_ocr = queue.Queue(maxsize=TAMANHO_FILA)       # YOLO -> OCR
+fila_decisao = queue.Queue()                       # OCR -> banco (uma decisão por veículo, nada é descartado)
+frame_novo = threading.Event()                     # Alguma câmera entregou frame para o YOLO
+
+parar = threading.Event()
+
+# Contadores e latências de cada estágio (publicados para o dashboard e em /metrics)
+metricas = Metricas()
+metricas.registrar_fila("ocr", fila_ocr)
+metricas.registrar_fila("decisao", fila_decisao)
+
+class Faixa:
+    """Uma câmera da portaria: captura, rastreamento, filtro de movimento e estado da tela."""
+
+    def __init__(self, nome, fonte, regiao=REGIAO_FAIXA):
+        self.nome = nome
+        self.fonte = fonte
+        self.cap = None
+        self.ativa = True
+
+        self.fila_video = queue.Queue(maxsize=TAMANHO_FILA)     # captura -> tela
+        self.fila_deteccao = queue.Queue(maxsize=TAMANHO_FILA)  # captura -> YOLO
+        metricas.registrar_fila(f"video_{nome}", self.fila_video)
+        metricas.registrar_fila(f"deteccao_{nome}", self.fila_deteccao)
+
+        # Cada veículo ganha um ID; o OCR só roda em trilhas ainda sem placa confirmada
+        self.rastreador = RastreadorVeiculos()
+        # Portaria vazia na maior parte do dia: o YOLO só acorda com movimento na faixa
+        self.movimento = DetectorMovimento(regiao=regiao)
+
+        # Canvas da janela desta faixa (reaproveitado a cada frame)
+        self.painel = PainelOperador()
+
+        # Estado compartilhado com a tela (protegido pela trava)
+        self.trava_estado = threading.Lock()
+        self.estado = {
+            "caixas": [],                    # [(x1, y1, x2, y2, tipo, rotulo), ...] do último YOLO
+            "tipo_veiculo_visual": "--",
+            "placa_lida_texto": "--",
+            "info_veiculo_db": None,
+            "ultimo_acesso_status": "AGUARDANDO",
+        }
+
+    def abrir(self):
+        self.cap = cv2.VideoCapture(self.fonte)
+
+    def fechar(self):
+        if self.cap is not None:
+            self.cap.release()
+
+def carregar_cameras():
+    """Lê a configuração das câmeras (ou usa a webcam 0)."""
+    if not os.path.exists(ARQUIVO_CAMERAS):
+        return [Faixa("portaria", 0)]
+    with open(ARQUIVO_CAMERAS, encoding="utf-8") as f:
+        config = json.load(f)
+    return [Faixa(c.get("nome", f"camera-{i}"), c["fonte"], c.get("regiao", REGIAO_FAIXA))
+            for i, c in enumerate(config)]
+
+def carregar_modelo_deteccao():
+    print(">>> Carregando IA (YOLO)...")
+    detector = carregar_detector()
+    aquecer_detector(detector)
+    return detector
+
+def carregar_servico_ocr():
+    print(">>> Carregando Leitor de Placas (OCR)...")
+    servico = ServicoOCR()
+    servico.aquecer()
+    return servico
+
+def inicializar():
     """
-    Tenta ler a placa. Se for moto, tenta juntar linhas quebradas.
+    Carrega o YOLO, o EasyOCR (cada um com uma inferência de aquecimento) e o
+    cache de veículos ao mesmo tempo, enquanto as câmeras abrem. Retorna
+    quando tudo está pronto.
     """
-    gray = cv2.cvtColor(img_recorte, cv2.COLOR_BGR2GRAY)
-    
-    # Aumenta contraste para ajudar na leitura
-    gray = cv2.equalizeHist(gray) 
-
-    result = reader.readtext(gray)
-    
-    canditatos = []
-    
-    # 1. Tenta achar placa em uma linha só (Padrão Carro)
-    for detection in result:
-        texto = detection[1]
-        limpo = ''.join(e for e in texto if e.isalnum()).upper()
-        if len(limpo) == 7:
-            return limpo # Achou perfeito
-        canditatos.append(limpo)
-
-    # 2. Estratégia Moto (Placa Mercosul Quadrada):
-    # O OCR pode ler 'BRA' depois '2E19'. Vamos tentar juntar pedaços.
-    texto_completo = "".join(canditatos)
-    if len(texto_completo) >= 7:
-        # Pega apenas os ultimos 7 caracteres (caso tenha lido sujeira antes)
-        # ou tenta achar padrao LLLNLNN
-        possivel_placa = texto_completo[-7:] 
-        # Validação simples: 3 primeiros letras, 4º numero (Mercosul Antigo) ou Letra (Mercosul Novo)
-        if possivel_placa[0].isalpha() and possivel_placa[1].isalpha():
-            return possivel_placa
-
-    return None
+    global model, servico_ocr, faixas, gravador_evidencias, banco, eventos
 
-def main():
-    global tempo_ref, info_veiculo_db, placa_lida_texto, tipo_veiculo_visual, ultimo_acesso_status
+    faixas = carregar_cameras()
+    gravador_evidencias = GravadorEvidencias()
+    print(">>> Inicializando Banco de Dados...")
+    banco = BancoDeDados()
+    with ThreadPoolExecutor(max_workers=3 + len(faixas), thread_name_prefix="inicializacao") as executor:
+        futuro_detector = executor.submit(carregar_modelo_deteccao)
+        futuro_ocr = executor.submit(carregar_servico_ocr)
+        futuro_cache = executor.submit(banco.carregar_cache)
+        for faixa in faixas:
+            print(f">>> Abrindo câmera '{faixa.nome}' ({faixa.fonte})...")
+            executor.submit(faixa.abrir)
+        model = futuro_detector.result()
+        servico_ocr = futuro_ocr.result()
+        futuro_cache.result()
+    eventos = ServicoEventos(banco) # Consulta de placas usa o cache já carregado
+
+def sinalizar_pronto(segundos):
+    """Cria o arquivo de prontidão (escrito em outro nome e renomeado, para nunca ser lido pela metade)."""
+    temporario = ARQUIVO_PRONTO + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"pid": os.getpid(), "pronto_em": time.strftime("%Y-%m-%d %H:%M:%S"),
+                   "inicializacao_s": round(segundos, 2)}, f)
+    os.replace(temporario, ARQUIVO_PRONTO)
+
+def limpar_pronto():
+    try:
+        os.remove(ARQUIVO_PRONTO)
+    except FileNotFoundError:
+        pass
 
+def colocar_descartando(fila, item):
+    """
+    Coloca o item na fila; se estiver cheia, joga fora o mais antigo.
+    Retorna True se algum item foi descartado.
+    """
+    descartou = False
     while True:
-        ret, frame = cap.read()
-        if not ret: break
+        try:
+            fila.put_nowait(item)
+            return descartou
+        except queue.Full:
+            try:
+                fila.get_nowait()
+                descartou = True
+            except queue.Empty:
+                pass
+
+def pegar(fila, timeout=0.1):
+    """Lê da fila sem travar para sempre (permite checar o sinal de parada)."""
+    try:
+        return fila.get(timeout=timeout)
+    except queue.Empty:
+        return None
+
+# --- ESTÁGIOS ---
+
+def estagio_captura(faixa):
+    """Lê a câmera na velocidade dela e entrega o frame mais novo para a tela e o YOLO."""
+    while not parar.is_set():
+        with metricas.medir("captura"):
+            ret, frame = faixa.cap.read()
+        if not ret:
+            print(f">>> Câmera '{faixa.nome}' parou de enviar imagens.")
+            faixa.ativa = False
+            if not any(f.ativa for f in faixas):
+                parar.set()
+            break
+        metricas.contar("frames_capturados")
 
         # Redimensiona o frame da câmera para caber na nossa interface (800x600)
-        frame_resized = cv2.resize(frame, (800, 600))
-        
-        # Cria o fundo da aplicação
-        interface = criar_interface_base()
-        
+        with metricas.medir("resize"):
+            frame_resized = cv2.resize(frame, (800, 600))
+
+        colocar_descartando(faixa.fila_video, frame_resized)
+        if colocar_descartando(faixa.fila_deteccao, frame_resized):
+            metricas.contar("frames_descartados") # YOLO não deu conta deste frame
+        frame_novo.set()
+
+def atualizar_faixa(faixa, frame_resized, deteccoes):
+    """Rastreia as detecções da faixa, atualiza a tela dela e devolve os pedidos de OCR."""
+    tipo_veiculo_visual = deteccoes[-1][1] if deteccoes else None
+
+    # --- RASTREAMENTO ---
+    trilhas = faixa.rastreador.atualizar(deteccoes)
+
+    caixas = []
+    pedidos_ocr = []
+    for trilha in trilhas:
+        x1, y1, x2, y2 = trilha.caixa
+        rotulo = f"{trilha.tipo} #{trilha.id}"
+        if trilha.placa_confirmada:
+            rotulo += f" {trilha.placa_confirmada}"
+        caixas.append((x1, y1, x2, y2, trilha.tipo, rotulo))
+
+        if faixa.rastreador.precisa_ocr(trilha):
+            # --- LOGICA DE CORTE (ROI) PARA OCR ---
+            # Recortamos a imagem do veículo para o OCR focar só nele
+            roi_veiculo = recortar(frame_resized, trilha.caixa)
+            if roi_veiculo.size:
+                pedidos_ocr.append((faixa, trilha, roi_veiculo))
+
+    with faixa.trava_estado:
+        faixa.estado["caixas"] = caixas
+        if tipo_veiculo_visual:
+            faixa.estado["tipo_veiculo_visual"] = tipo_veiculo_visual
+
+    return pedidos_ocr
+
+def estagio_deteccao():
+    """
+    Junta o frame mais recente de cada faixa que tem movimento, roda o YOLO
+    uma vez só para o lote inteiro e devolve o resultado para cada faixa.
+    """
+    while not parar.is_set():
+        if not frame_novo.wait(timeout=0.1):
+            continue
+        frame_novo.clear()
+
+        lote = []
+        for faixa in faixas:
+            try:
+                frame_resized = faixa.fila_deteccao.get_nowait()
+            except queue.Empty:
+                continue
+
+            # --- FILTRO DE MOVIMENTO ---
+            # Cena parada e nenhum veículo esperando leitura: não gasta CPU com o YOLO
+            with metricas.medir("movimento"):
+                detectar = faixa.movimento.deve_detectar(frame_resized, faixa.rastreador.pendentes())
+            if detectar:
+                lote.append((faixa, frame_resized))
+            else:
+                faixa.rastreador.manter_trilhas()
+                metricas.contar("frames_sem_movimento")
+
+        if not lote:
+            continue
+
         # --- DETECÇÃO VISUAL (YOLO) ---
-        # Detecta apenas na imagem da camera
-        results = model(frame_resized, stream=True, verbose=False, conf=0.5)
-        
-        roi_veiculo = None # Região de Interesse (Recorte do veiculo)
-
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                
-                # 2=Carro, 3=Moto, 5=Onibus, 7=Caminhao
-                if cls in [2, 3, 5, 7]:
-                    # Identifica tipo
-                    if cls == 2: tipo_veiculo_visual = "CARRO"
-                    elif cls == 3: tipo_veiculo_visual = "MOTO"
-                    elif cls == 5: tipo_veiculo_visual = "ONIBUS"
-                    else: tipo_veiculo_visual = "CAMINHAO"
-
-                    # Desenha Box no Vídeo
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    cor_box = AZUL
-                    if tipo_veiculo_visual == "MOTO": cor_box = AMARELO # Destaca moto
-                    
-                    cv2.rectangle(frame_resized, (x1, y1), (x2, y2), cor_box, 2)
-                    cv2.putText(frame_resized, tipo_veiculo_visual, (x1, y1 - 10), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, cor_box, 2)
-
-                    # --- LOGICA DE CORTE (ROI) PARA OCR ---
-                    # Recortamos a imagem do veículo para o OCR focar só nele
-                    # Adicionamos uma margem de segurança
-                    h, w, _ = frame_resized.shape
-                    y1_c = max(0, y1)
-                    y2_c = min(h, y2)
-                    x1_c = max(0, x1)
-                    x2_c = min(w, x2)
-                    
-                    roi_veiculo = frame_resized[y1_c:y2_c, x1_c:x2_c]
-
-        # --- RECONHECIMENTO DE PLACA (OCR) ---
-        # Só roda se passou o tempo E se existe um veículo detectado para focar
-        if (time.time() - tempo_ref > tempo_espera_ocr) and roi_veiculo is not None:
-            
-            # Tenta ler no recorte (Zoom no veiculo) - Muito melhor para motos
-            placa_detectada = processar_ocr_inteligente(roi_veiculo)
-            
-            if not placa_detectada:
-                # Se falhar no recorte, tenta na imagem inteira (backup)
-                placa_detectada = processar_ocr_inteligente(frame_resized)
-
-            if placa_detectada:
-                placa_lida_texto = placa_detectada
-                
-                # Busca no Banco
-                info = db.buscar_veiculo(placa_lida_texto)
-                
-                if info:
-                    info_veiculo_db = info
-                    if info['status'] == 'AUTORIZADO':
-                        ultimo_acesso_status = "AUTORIZADO"
-                        db.registrar_acesso(placa_lida_texto)
-                    else:
-                        ultimo_acesso_status = "BLOQUEADO"
-                else:
-                    info_veiculo_db = None
-                    ultimo_acesso_status = "NAO CADASTRADO"
-            
-            tempo_ref = time.time()
-
-        # --- MONTAGEM DA INTERFACE ---
-        
-        # 1. Cola o vídeo da câmera na esquerda
-        # Centraliza verticalmente (720 - 600) / 2 = 60
-        y_offset = 60
-        interface[y_offset:y_offset+600, 0:800] = frame_resized
-
-        # 2. Desenha o Painel de Informações (Direita)
-        col_x = 830 # Margem esquerda do painel
-        
-        # Cabeçalho
-        cv2.putText(interface, "SISTEMA DE ACESSO", (col_x, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, COR_TEXTO, 2)
-        cv2.line(interface, (col_x, 60), (LARGURA_TELA - 30, 60), COR_TEXTO, 1)
-
-        # Status Visual da IA
-        cv2.putText(interface, "Veiculo Detectado:", (col_x, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, COR_TEXTO, 1)
-        cv2.putText(interface, tipo_veiculo_visual, (col_x, 160), cv2.FONT_HERSHEY_SIMPLEX, 1.2, AMARELO, 3)
-
-        # Placa Lida
-        cv2.putText(interface, "Placa Lida (OCR):", (col_x, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.7, COR_TEXTO, 1)
-        cv2.rectangle(interface, (col_x, 260), (LARGURA_TELA-30, 340), (255,255,255), 2) # Caixa da placa
-        cv2.putText(interface, placa_lida_texto, (col_x + 20, 320), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255,255,255), 4)
-
-        # Dados do Banco
-        if info_veiculo_db:
-            cv2.putText(interface, f"Proprietario: {info_veiculo_db['proprietario']}", (col_x, 400), cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_TEXTO, 1)
-            cv2.putText(interface, f"Tipo Cadastrado: {info_veiculo_db['tipo']}", (col_x, 430), cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_TEXTO, 1)
-            
-            # Alerta de divergência (Carro vs Moto)
-            if tipo_veiculo_visual not in ["--", "Nenhum"] and info_veiculo_db['tipo'] != tipo_veiculo_visual:
-                cv2.rectangle(interface, (col_x, 450), (LARGURA_TELA-30, 480), VERMELHO, -1)
-                cv2.putText(interface, "ALERTA: TIPO DIVERGENTE", (col_x + 10, 475), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,255), 2)
-        else:
-             cv2.putText(interface, "Aguardando leitura válida...", (col_x, 400), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100,100,100), 1)
-
-        # Resultado Final (Status Grande)
-        cor_status = VERDE
-        if ultimo_acesso_status == "BLOQUEADO": cor_status = VERMELHO
-        elif ultimo_acesso_status == "NAO CADASTRADO": cor_status = AZUL
-        elif ultimo_acesso_status == "AGUARDANDO": cor_status = (100,100,100)
-
-        cv2.rectangle(interface, (col_x, 550), (LARGURA_TELA-30, 650), cor_status, -1)
-        # Centraliza texto do status
-        texto_status = ultimo_acesso_status
-        (w_text, h_text), _ = cv2.getTextSize(texto_status, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
-        centro_x = col_x + (LARGURA_TELA - 30 - col_x - w_text) // 2
-        cv2.putText(interface, texto_status, (centro_x, 615), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
-
-        # Rodapé
-        cv2.putText(interface, "Pressione 'Q' para sair", (col_x, 700), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150,150,150), 1)
-
-        # Mostra a Interface Final
-        cv2.imshow("Sistema de Controle de Acesso - IF Machado", interface)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        with metricas.medir("yolo"):
+            resultados = detectar_veiculos_lote(model, [frame for _, frame in lote])
+        metricas.contar("frames_detectados", len(lote))
+
+        pedidos_ocr = []
+        for (faixa, frame_resized), deteccoes in zip(lote, resultados):
+            pedidos_ocr += atualizar_faixa(faixa, frame_resized, deteccoes)
+
+        if pedidos_ocr:
+            colocar_descartando(fila_ocr, pedidos_ocr)
+
+def estagio_ocr():
+    """
+    Localiza a placa dentro de cada veículo e envia só esses recortes
+    pequenos para o pool de OCR. Cada processo do pool lê um recorte, então
+    vários veículos (e várias regiões candidatas) são lidos em paralelo. As
+    leituras viram votos na trilha; a decisão só sai quando a placa é
+    confirmada pela maioria.
+    """
+    # Não deixa acumular trabalho velho no pool: o serviço conta cada recorte
+    # enviado até ele terminar (ou ser cancelado); com o pool cheio, novos
+    # veículos esperam o próximo frame
+    def ao_ler(faixa, trilha, placa_detectada, t0, roi_veiculo, recorte_placa):
+        metricas.observar("ocr", (time.perf_counter() - t0) * 1000.0)
+        metricas.contar("ocr_sucesso" if placa_detectada else "ocr_falha")
+        confirmada = faixa.rastreador.registrar_leitura(trilha.id, placa_detectada)
+        if confirmada:
+            # As imagens seguem junto para virar evidência, se o acesso for registrado
+            fila_decisao.put((faixa, confirmada.placa_confirmada, confirmada.tipo, roi_veiculo, recorte_placa))
+
+    while not parar.is_set():
+        item = pegar(fila_ocr)
+        if item is None:
+            continue
+
+        for faixa, trilha, roi_veiculo in item:
+            if not faixa.rastreador.precisa_ocr(trilha):
+                continue
+            if not servico_ocr.tem_vaga():
+                break # Pool ocupado: o resto fica para um frame mais novo
+
+            with metricas.medir("localizador"):
+                recortes = recortes_para_ocr(roi_veiculo)
+            if not recortes:
+                continue
+
+            faixa.rastreador.marcar_ocr(trilha)
+            # Regiões candidatas, da mais para a menos provável, lidas ao mesmo tempo
+            servico_ocr.ler_primeiro_valido(
+                recortes,
+                callback=lambda placa, rec, f=faixa, t=trilha, t0=time.perf_counter(), roi=roi_veiculo:
+                    ao_ler(f, t, placa, t0, roi, rec),
+            )
+
+def guardar_evidencia(roi_veiculo, recorte_placa):
+    """
+    Função passada ao registro do acesso: agenda as imagens no gravador (sem
+    esperar o disco) e devolve a chave que vai para 'acessos.evidencia'.
+    """
+    def salvar(placa, instante):
+        chave = gravador_evidencias.salvar(placa, instante, roi_veiculo, recorte_placa)
+        metricas.contar("evidencias" if chave else "evidencias_descartadas")
+        return chave
+    return salvar
+
+def estagio_decisao():
+    """
+    Decide o acesso com o cache de veículos já carregado (sem consulta ao
+    disco) e entrega o registro ao escritor em lote.
+    """
+    while not parar.is_set():
+        item = pegar(fila_decisao)
+        if item is None:
+            continue
+        faixa, placa_lida_texto, tipo_veiculo_visual, roi_veiculo, recorte_placa = item
+
+        with metricas.medir("decisao"):
+            placa_lida_texto, info, ultimo_acesso_status, registrado = decidir_acesso(
+                banco, placa_lida_texto, evidencia=guardar_evidencia(roi_veiculo, recorte_placa))
+        metricas.contar("decisoes")
+        if info:
+            metricas.contar("decisoes_banco") # Placa encontrada no cadastro
+        if registrado: # Repetições da mesma placa não viram evento (nem linha no banco)
+            eventos.publicar({
+                "faixa": faixa.nome,
+                "placa": placa_lida_texto,
+                "proprietario": info["proprietario"] if info else None,
+                "tipo": info["tipo"] if info else tipo_veiculo_visual,
+                "categoria": info["categoria"] if info else None,
+                "status": ultimo_acesso_status,
+                "data_hora": time.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+
+        with faixa.trava_estado:
+            faixa.estado["placa_lida_texto"] = placa_lida_texto
+            faixa.estado["tipo_veiculo_visual"] = tipo_veiculo_visual
+            faixa.estado["info_veiculo_db"] = info
+            faixa.estado["ultimo_acesso_status"] = ultimo_acesso_status
+
+def main():
+    limpar_pronto()
+    inicio = time.perf_counter()
+
+    # O publicador sobe antes dos modelos: /saude responde 503 enquanto carrega
+    publicador = PublicadorMetricas(metricas, ARQUIVO_BANCO)
+    publicador.iniciar()
+
+    inicializar()
+    eventos.iniciar()
+
+    estagios = [threading.Thread(target=estagio_captura, args=(faixa,), name=f"captura-{faixa.nome}", daemon=True)
+                for faixa in faixas]
+    estagios += [
+        threading.Thread(target=estagio_deteccao, name="deteccao", daemon=True),
+        threading.Thread(target=estagio_ocr, name="ocr", daemon=True),
+        threading.Thread(target=estagio_decisao, name="decisao", daemon=True),
+    ]
+    for t in estagios:
+        t.start()
+
+    segundos = time.perf_counter() - inicio
+    print(f">>> Portaria pronta em {segundos:.1f}s")
+    metricas.observar("inicializacao", segundos * 1000.0)
+    publicador.pronto.set()
+    sinalizar_pronto(segundos)
+
+    # A tela fica na thread principal (exigência do cv2.imshow) e anda no
+    # ritmo das câmeras, independente de quanto o YOLO/OCR demoram, limitada
+    # a FPS_TELA. Uma janela por faixa.
+    intervalo_tela = 1.0 / FPS_TELA
+    proxima_tela = time.perf_counter()
+    while not parar.is_set():
+        for faixa in faixas:
+            try:
+                frame_resized = faixa.fila_video.get_nowait()
+            except queue.Empty:
+                continue # Nenhum frame novo desta câmera: a janela fica como está
+
+            with faixa.trava_estado:
+                snapshot = dict(faixa.estado)
+
+            with metricas.medir("tela"):
+                interface = faixa.painel.desenhar(
+                    frame_resized,
+                    snapshot["caixas"],
+                    snapshot["tipo_veiculo_visual"],
+                    snapshot["placa_lida_texto"],
+                    snapshot["info_veiculo_db"],
+                    snapshot["ultimo_acesso_status"],
+                )
+
+                # Mostra a Interface Final
+                titulo = TITULO_JANELA if len(faixas) == 1 else f"{TITULO_JANELA} - {faixa.nome}"
+                cv2.imshow(titulo, interface)
+            metricas.contar("frames_exibidos")
+
+        # O waitKey também é a espera até a próxima atualização da tela
+        proxima_tela = max(proxima_tela + intervalo_tela, time.perf_counter())
+        espera_ms = max(1, int((proxima_tela - time.perf_counter()) * 1000))
+        if cv2.waitKey(espera_ms) & 0xFF == ord('q'):
             break
 
-    cap.release()
+    parar.set()
+    for t in estagios:
+        t.join(timeout=5)
+
+    limpar_pronto()
+    publicador.fechar()
+    eventos.fechar()
+    for faixa in faixas:
+        faixa.fechar()
+    servico_ocr.fechar()
+    gravador_evidencias.fechar()
+    banco.fechar()
     cv2.destroyAllWindows()
-    db.fechar()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
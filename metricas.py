@@ -0,0 +1,214 @@
+import bisect
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- CONFIGURAÇÕES ---
+INTERVALO_PUBLICACAO = 5.0      # Segundos entre gravações na tabela 'metricas_sistema'
+JANELA_LATENCIAS = 500          # Últimas N medições usadas nos percentis
+PORTA_METRICAS = int(os.environ.get("METRICAS_PORTA", "9108"))  # 0 desliga o endpoint HTTP
+
+# Limites (ms) dos baldes do histograma de latência (formato Prometheus)
+BALDES_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+class Histograma:
+    """Histograma acumulado (para o Prometheus) + janela recente (para os percentis)."""
+
+    def __init__(self):
+        self.baldes = [0] * (len(BALDES_MS) + 1)
+        self.soma = 0.0
+        self.total = 0
+        self.recentes = deque(maxlen=JANELA_LATENCIAS)
+
+    def observar(self, ms):
+        self.baldes[bisect.bisect_left(BALDES_MS, ms)] += 1
+        self.soma += ms
+        self.total += 1
+        self.recentes.append(ms)
+
+    def percentil(self, p):
+        if not self.recentes:
+            return None
+        ordenados = sorted(self.recentes)
+        return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100.0))]
+
+class Metricas:
+    """
+    Contadores e histogramas de latência do pipeline. Registrar é barato
+    (uma trava curta); o resumo e a publicação são feitos fora do caminho crítico.
+    """
+
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+        self.filas = {}        # nome -> fila (profundidade lida na hora do resumo)
+        self.inicio = time.time()
+
+    def contar(self, nome, n=1):
+        with self.trava:
+            self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def observar(self, estagio, ms):
+        with self.trava:
+            histograma = self.histogramas.get(estagio)
+            if histograma is None:
+                histograma = self.histogramas[estagio] = Histograma()
+            histograma.observar(ms)
+
+    @contextmanager
+    def medir(self, estagio):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(estagio, (time.perf_counter() - t0) * 1000.0)
+
+    def registrar_fila(self, nome, fila):
+        self.filas[nome] = fila
+
+    def resumo(self):
+        """Fotografia atual: contadores, p50/p95 por estágio, filas e taxas derivadas."""
+        with self.trava:
+            contadores = dict(self.contadores)
+            latencias = {nome: (h.percentil(50), h.percentil(95))
+                         for nome, h in self.histogramas.items()}
+
+        valores = {f"contador_{nome}": v for nome, v in contadores.items()}
+        for nome, (p50, p95) in latencias.items():
+            if p50 is not None:
+                valores[f"latencia_{nome}_p50_ms"] = round(p50, 2)
+                valores[f"latencia_{nome}_p95_ms"] = round(p95, 2)
+        for nome, fila in self.filas.items():
+            valores[f"fila_{nome}"] = fila.qsize()
+
+        # Taxas (0 a 1) que mostram se a portaria está acertando
+        leituras = contadores.get("ocr_sucesso", 0) + contadores.get("ocr_falha", 0)
+        if leituras:
+            valores["taxa_ocr_sucesso"] = round(contadores.get("ocr_sucesso", 0) / leituras, 3)
+        decisoes = contadores.get("decisoes", 0)
+        if decisoes:
+            valores["taxa_resolvido_banco"] = round(contadores.get("decisoes_banco", 0) / decisoes, 3)
+        capturados = contadores.get("frames_capturados", 0)
+        if capturados:
+            valores["taxa_frames_descartados"] = round(contadores.get("frames_descartados", 0) / capturados, 3)
+        valores["tempo_ativo_s"] = round(time.time() - self.inicio, 1)
+        return valores
+
+    def texto_prometheus(self):
+        """Formato texto do Prometheus (contadores, histogramas e filas)."""
+        linhas = []
+        with self.trava:
+            for nome, v in sorted(self.contadores.items()):
+                linhas.append(f"# TYPE portaria_{nome}_total counter")
+                linhas.append(f"portaria_{nome}_total {v}")
+            for nome, h in sorted(self.histogramas.items()):
+                metrica = f"portaria_latencia_{nome}_ms"
+                linhas.append(f"# TYPE {metrica} histogram")
+                acumulado = 0
+                for limite, qtd in zip(BALDES_MS + ["+Inf"], h.baldes):
+                    acumulado += qtd
+                    linhas.append(f'{metrica}_bucket{{le="{limite}"}} {acumulado}')
+                linhas.append(f"{metrica}_sum {h.soma:.3f}")
+                linhas.append(f"{metrica}_count {h.total}")
+        for nome, fila in sorted(self.filas.items()):
+            linhas.append(f"# TYPE portaria_fila_{nome} gauge")
+            linhas.append(f"portaria_fila_{nome} {fila.qsize()}")
+        return "\n".join(linhas) + "\n"
+
+class PublicadorMetricas:
+    """
+    Thread que grava o resumo na tabela 'metricas_sistema' (lida pelo dashboard)
+    e, se a porta estiver configurada, serve /metrics no formato Prometheus e
+    /saude (prontidão da portaria).
+    """
+
+    # Contadores que também viram taxa por segundo (ex.: FPS)
+    TAXAS = {"frames_capturados": "fps_captura", "frames_exibidos": "fps_tela",
+             "frames_detectados": "fps_deteccao", "decisoes": "decisoes_por_minuto"}
+
+    def __init__(self, metricas, caminho_banco, intervalo=INTERVALO_PUBLICACAO, porta=PORTA_METRICAS):
+        self.metricas = metricas
+        self.caminho_banco = caminho_banco
+        self.intervalo = intervalo
+        self.porta = porta
+        self.pronto = threading.Event()   # Marcado pela portaria quando já lê placas
+        self._parar = threading.Event()
+        self._servidor = None
+        self._thread = threading.Thread(target=self._executar, name="metricas", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        if self.porta:
+            self._iniciar_http()
+
+    def _iniciar_http(self):
+        metricas = self.metricas
+        pronto = self.pronto
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/saude":
+                    # 200 quando a portaria está pronta, 503 enquanto os modelos carregam
+                    self.send_response(200 if pronto.is_set() else 503)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                corpo = metricas.texto_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass # Sem log a cada coleta
+
+        try:
+            self._servidor = ThreadingHTTPServer(("127.0.0.1", self.porta), Handler)
+        except OSError as e:
+            print(f"[metricas] Endpoint HTTP desligado (porta {self.porta}): {e}")
+            return
+        threading.Thread(target=self._servidor.serve_forever, name="metricas-http", daemon=True).start()
+
+    def _executar(self):
+        conn = sqlite3.connect(self.caminho_banco)
+        anterior = {}
+        t_anterior = time.time()
+        try:
+            while not self._parar.wait(self.intervalo):
+                agora = time.time()
+                valores = self.metricas.resumo()
+
+                dt = max(agora - t_anterior, 1e-6)
+                for contador, taxa in self.TAXAS.items():
+                    atual = valores.get(f"contador_{contador}", 0)
+                    por_segundo = (atual - anterior.get(contador, 0)) / dt
+                    valores[taxa] = round(por_segundo * (60 if taxa.endswith("minuto") else 1), 2)
+                    anterior[contador] = atual
+                t_anterior = agora
+
+                atualizado_em = time.strftime("%Y-%m-%d %H:%M:%S")
+                try:
+                    with conn:
+                        conn.executemany("""
+                            INSERT INTO metricas_sistema (chave, valor, atualizado_em) VALUES (?, ?, ?)
+                            ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor,
+                                                             atualizado_em = excluded.atualizado_em
+                        """, [(k, v, atualizado_em) for k, v in valores.items()])
+                except sqlite3.Error as e:
+                    print(f"[metricas] Falha ao publicar: {e}")
+        finally:
+            conn.close()
+
+    def fechar(self):
+        self._parar.set()
+        if self._servidor:
+            self._servidor.shutdown()
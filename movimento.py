@@ -0,0 +1,77 @@
+import os
+import json
+import time
+
+import cv2
+import numpy as np
+
+# --- CONFIGURAÇÕES ---
+TAMANHO_ANALISE = (160, 120)   # A comparação é feita numa miniatura (barato)
+LIMIAR_PIXEL = 25              # Diferença de brilho (0-255) para o pixel contar como mudança
+SENSIBILIDADE = float(os.environ.get("MOVIMENTO_SENSIBILIDADE", "0.01"))  # Fração da faixa que precisa mudar
+APRENDIZADO_FUNDO = 0.05       # Velocidade com que o fundo absorve mudanças lentas (luz, sombra)
+TEMPO_ATIVO = 2.0              # Depois de um movimento, continua detectando por este tempo
+INTERVALO_BATIMENTO = 5.0      # Sem movimento, roda o YOLO mesmo assim a cada N segundos
+
+# Faixa da portaria como polígono em coordenadas relativas (0 a 1), ex.:
+# MOVIMENTO_REGIAO='[[0.2, 0.3], [0.8, 0.3], [0.9, 1.0], [0.1, 1.0]]'
+# Sem configuração, a imagem inteira é observada.
+REGIAO_FAIXA = json.loads(os.environ["MOVIMENTO_REGIAO"]) if os.environ.get("MOVIMENTO_REGIAO") else None
+
+class DetectorMovimento:
+    """
+    Decide se vale a pena rodar o YOLO no frame. Compara uma miniatura em
+    tons de cinza com um fundo que se adapta devagar; só acorda a detecção
+    quando algo muda dentro da faixa da portaria (ou no batimento periódico).
+    """
+
+    def __init__(self, sensibilidade=SENSIBILIDADE, regiao=REGIAO_FAIXA,
+                 tempo_ativo=TEMPO_ATIVO, intervalo_batimento=INTERVALO_BATIMENTO):
+        self.sensibilidade = sensibilidade
+        self.tempo_ativo = tempo_ativo
+        self.intervalo_batimento = intervalo_batimento
+
+        largura, altura = TAMANHO_ANALISE
+        self.mascara = np.full((altura, largura), 255, dtype=np.uint8)
+        if regiao:
+            self.mascara[:] = 0
+            pontos = np.array([(x * largura, y * altura) for x, y in regiao], dtype=np.int32)
+            cv2.fillPoly(self.mascara, [pontos], 255)
+        self.pixels_regiao = max(1, cv2.countNonZero(self.mascara))
+
+        self.fundo = None
+        self.ultimo_movimento = float("-inf")
+        self.ultima_deteccao = float("-inf")
+
+    def fracao_alterada(self, frame):
+        """Fração (0 a 1) da faixa que mudou em relação ao fundo."""
+        mini = cv2.resize(frame, TAMANHO_ANALISE, interpolation=cv2.INTER_AREA)
+        mini = cv2.cvtColor(mini, cv2.COLOR_BGR2GRAY)
+        mini = cv2.GaussianBlur(mini, (5, 5), 0)
+
+        if self.fundo is None:
+            self.fundo = mini.astype(np.float32)
+            return 1.0 # Primeiro frame: sempre detecta
+
+        diferenca = cv2.absdiff(mini, cv2.convertScaleAbs(self.fundo))
+        _, alterados = cv2.threshold(diferenca, LIMIAR_PIXEL, 255, cv2.THRESH_BINARY)
+        alterados = cv2.bitwise_and(alterados, self.mascara)
+        cv2.accumulateWeighted(mini, self.fundo, APRENDIZADO_FUNDO)
+        return cv2.countNonZero(alterados) / float(self.pixels_regiao)
+
+    def deve_detectar(self, frame, manter_ativo=False, agora=None):
+        """
+        True se o YOLO deve rodar neste frame: houve movimento na faixa (ou
+        há pouco tempo), 'manter_ativo' foi pedido (ex.: veículo ainda sem
+        placa confirmada) ou chegou a hora do batimento.
+        """
+        agora = time.time() if agora is None else agora
+        if self.fracao_alterada(frame) >= self.sensibilidade:
+            self.ultimo_movimento = agora
+
+        detectar = (manter_ativo
+                    or agora - self.ultimo_movimento <= self.tempo_ativo
+                    or agora - self.ultima_deteccao >= self.intervalo_batimento)
+        if detectar:
+            self.ultima_deteccao = agora
+        return detectar
@@ -0,0 +1,117 @@
+import os
+
+import cv2
+import numpy as np
+
+# --- CONFIGURAÇÕES GERAIS ---
+LARGURA_TELA = 1280
+ALTURA_TELA = 720
+COR_FUNDO = (30, 30, 30)
+COR_PAINEL = (50, 50, 50)
+COR_TEXTO = (200, 200, 200)
+VERDE = (0, 255, 0)
+VERMELHO = (0, 0, 255)
+AZUL = (255, 0, 0)
+AMARELO = (0, 255, 255)
+
+# Teto de atualização da tela. A câmera e o YOLO seguem no ritmo deles; a
+# tela não precisa de mais que isso para o operador acompanhar.
+FPS_TELA = float(os.environ.get("TELA_FPS", "15"))
+
+# Área do vídeo: centralizado verticalmente (720 - 600) / 2 = 60
+Y_VIDEO = 60
+LARGURA_VIDEO, ALTURA_VIDEO = 800, 600
+COL_X = 830 # Margem esquerda do painel
+
+CORES_STATUS = {"BLOQUEADO": VERMELHO, "NAO CADASTRADO": AZUL, "AGUARDANDO": (100, 100, 100)}
+
+def desenhar_camada_fixa():
+    """Fundo, painel lateral e textos que nunca mudam (desenhados uma vez só)."""
+    img = np.zeros((ALTURA_TELA, LARGURA_TELA, 3), dtype=np.uint8)
+    img[:] = COR_FUNDO
+    # Desenha a área do painel lateral
+    cv2.rectangle(img, (800, 0), (LARGURA_TELA, ALTURA_TELA), COR_PAINEL, -1)
+
+    # Cabeçalho
+    cv2.putText(img, "SISTEMA DE ACESSO", (COL_X, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, COR_TEXTO, 2)
+    cv2.line(img, (COL_X, 60), (LARGURA_TELA - 30, 60), COR_TEXTO, 1)
+
+    cv2.putText(img, "Veiculo Detectado:", (COL_X, 120), cv2.FONT_HERSHEY_SIMPLEX, 0.7, COR_TEXTO, 1)
+    cv2.putText(img, "Placa Lida (OCR):", (COL_X, 240), cv2.FONT_HERSHEY_SIMPLEX, 0.7, COR_TEXTO, 1)
+
+    # Rodapé
+    cv2.putText(img, "Pressione 'Q' para sair", (COL_X, 700), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150, 150, 150), 1)
+    return img
+
+class PainelOperador:
+    """
+    Tela do operador com um canvas alocado uma vez. A camada fixa é copiada
+    só na criação; o painel lateral é redesenhado apenas quando o estado da
+    decisão muda; o vídeo é escrito direto na sua área do canvas.
+    """
+
+    def __init__(self):
+        self.camada_fixa = desenhar_camada_fixa()
+        self.tela = self.camada_fixa.copy()
+        self.video = self.tela[Y_VIDEO:Y_VIDEO + ALTURA_VIDEO, 0:LARGURA_VIDEO]  # View, sem cópia
+        self._estado_painel = None
+        self._posicao_status = {}   # Texto do status -> x centralizado (getTextSize uma vez por texto)
+
+    def desenhar(self, frame_resized, caixas, tipo_veiculo_visual, placa_lida_texto,
+                 info_veiculo_db, ultimo_acesso_status):
+        """
+        Monta a interface: vídeo com as caixas do YOLO + painel lateral.
+        Devolve o canvas interno (reaproveitado na próxima chamada).
+        """
+        # 1. Vídeo da câmera, copiado direto na área dele
+        np.copyto(self.video, frame_resized)
+
+        # Caixas no canvas (o frame original segue limpo para o OCR)
+        for x1, y1, x2, y2, tipo, rotulo in caixas:
+            cor_box = AMARELO if tipo == "MOTO" else AZUL # Destaca moto
+            cv2.rectangle(self.video, (x1, y1), (x2, y2), cor_box, 2)
+            cv2.putText(self.video, rotulo, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, cor_box, 2)
+
+        # 2. Painel lateral, só se algo mudou
+        estado = (tipo_veiculo_visual, placa_lida_texto, ultimo_acesso_status,
+                  (info_veiculo_db['proprietario'], info_veiculo_db['tipo']) if info_veiculo_db else None)
+        if estado != self._estado_painel:
+            self._desenhar_painel(tipo_veiculo_visual, placa_lida_texto, info_veiculo_db, ultimo_acesso_status)
+            self._estado_painel = estado
+
+        return self.tela
+
+    def _desenhar_painel(self, tipo_veiculo_visual, placa_lida_texto, info_veiculo_db, ultimo_acesso_status):
+        # Volta o painel para a camada fixa e desenha só a parte variável
+        self.tela[:, 800:] = self.camada_fixa[:, 800:]
+        painel = self.tela
+
+        # Status Visual da IA
+        cv2.putText(painel, tipo_veiculo_visual, (COL_X, 160), cv2.FONT_HERSHEY_SIMPLEX, 1.2, AMARELO, 3)
+
+        # Placa Lida
+        cv2.rectangle(painel, (COL_X, 260), (LARGURA_TELA - 30, 340), (255, 255, 255), 2) # Caixa da placa
+        cv2.putText(painel, placa_lida_texto, (COL_X + 20, 320), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (255, 255, 255), 4)
+
+        # Dados do Banco
+        if info_veiculo_db:
+            cv2.putText(painel, f"Proprietario: {info_veiculo_db['proprietario']}", (COL_X, 400), cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_TEXTO, 1)
+            cv2.putText(painel, f"Tipo Cadastrado: {info_veiculo_db['tipo']}", (COL_X, 430), cv2.FONT_HERSHEY_SIMPLEX, 0.6, COR_TEXTO, 1)
+
+            # Alerta de divergência (Carro vs Moto)
+            if tipo_veiculo_visual not in ["--", "Nenhum"] and info_veiculo_db['tipo'] != tipo_veiculo_visual:
+                cv2.rectangle(painel, (COL_X, 450), (LARGURA_TELA - 30, 480), VERMELHO, -1)
+                cv2.putText(painel, "ALERTA: TIPO DIVERGENTE", (COL_X + 10, 475), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        else:
+            cv2.putText(painel, "Aguardando leitura válida...", (COL_X, 400), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
+
+        # Resultado Final (Status Grande)
+        cor_status = CORES_STATUS.get(ultimo_acesso_status, VERDE)
+        cv2.rectangle(painel, (COL_X, 550), (LARGURA_TELA - 30, 650), cor_status, -1)
+
+        # Centraliza texto do status
+        centro_x = self._posicao_status.get(ultimo_acesso_status)
+        if centro_x is None:
+            (w_text, _), _ = cv2.getTextSize(ultimo_acesso_status, cv2.FONT_HERSHEY_SIMPLEX, 1.2, 3)
+            centro_x = self._posicao_status[ultimo_acesso_status] = COL_X + (LARGURA_TELA - 30 - COL_X - w_text) // 2
+        cv2.putText(painel, ultimo_acesso_status, (centro_x, 615), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 3)
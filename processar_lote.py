@@ -0,0 +1,248 @@
+"""
+Processamento em lote, sem tela: roda detecção + OCR sobre um vídeo gravado,
+uma URL (RTSP/HTTP) ou uma pasta de imagens e grava os resultados em JSONL
+e/ou no banco. No fim mostra frames/s e placas/s.
+
+Exemplos:
+    python processar_lote.py simulacao_IMG --saida resultados.jsonl
+    python processar_lote.py gravacao.mp4 --passo 5 --gravar-banco --inicio "2026-03-01 07:00:00"
+    python processar_lote.py rtsp://camera-portaria/stream --max-frames 3000
+"""
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import cv2
+
+from banco_dados import BancoDeDados
+from servico_ocr import ServicoOCR, NUM_PROCESSOS_OCR
+from rastreador import RastreadorVeiculos
+from localizador_placa import recortes_para_ocr
+from reconhecimento import carregar_detector, detectar_veiculos, recortar, decidir_acesso
+
+EXTENSOES_IMAGEM = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+def ler_fonte(fonte, passo=1, max_frames=None):
+    """
+    Gera (indice, segundos_no_video, nome, frame) da fonte. Frames pulados
+    pelo 'passo' são só avançados com grab(), sem decodificar.
+    """
+    if os.path.isdir(fonte):
+        arquivos = sorted(f for f in os.listdir(fonte)
+                          if os.path.splitext(f)[1].lower() in EXTENSOES_IMAGEM)
+        for indice, nome in enumerate(arquivos[::passo][:max_frames]):
+            frame = cv2.imread(os.path.join(fonte, nome))
+            if frame is not None:
+                yield indice, None, nome, frame
+        return
+
+    cap = cv2.VideoCapture(fonte)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    indice = 0
+    entregues = 0
+    try:
+        while max_frames is None or entregues < max_frames:
+            if indice % passo:
+                if not cap.grab():
+                    break
+                indice += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield indice, indice / fps, f"{os.path.basename(fonte)}#{indice}", frame
+            entregues += 1
+            indice += 1
+    finally:
+        cap.release()
+
+class ProcessadorLote:
+    """
+    Detecção na thread principal, OCR no pool de processos e gravação dos
+    resultados numa thread própria (dona do arquivo e da conexão SQLite).
+    Diferente da portaria, aqui nada é descartado: se o OCR estiver cheio,
+    a leitura dos frames espera.
+    """
+
+    def __init__(self, saida=None, gravar_banco=False, inicio=None, processos=NUM_PROCESSOS_OCR,
+                 largura=None):
+        self.saida = saida
+        self.gravar_banco = gravar_banco
+        self.inicio = inicio
+        self.largura = largura
+
+        print(">>> Carregando IA (YOLO)...")
+        self.model = carregar_detector()
+        print(">>> Carregando Leitor de Placas (OCR)...")
+        self.servico_ocr = ServicoOCR(processos, max_pendentes=processos * 2)
+
+        # Veículos com leitura em andamento: a espera final em processar() usa
+        # para saber que todos os callbacks já publicaram
+        self.vagas = threading.BoundedSemaphore(processos * 2)
+        self.fila_resultados = queue.Queue()
+        self.frames_lidos = 0
+        self.veiculos = 0
+        self.placas = 0
+
+    def _instante(self, segundos):
+        """Horário do acesso: início da gravação + posição no vídeo (ou agora)."""
+        if self.inicio is None:
+            return time.time()
+        return self.inicio.timestamp() + (segundos or 0.0)
+
+    def _redimensionar(self, frame):
+        if not self.largura or frame.shape[1] == self.largura:
+            return frame
+        altura = int(frame.shape[0] * self.largura / frame.shape[1])
+        return cv2.resize(frame, (self.largura, altura))
+
+    def _enviar_ocr(self, roi, ao_ler):
+        recortes = recortes_para_ocr(roi)
+        if not recortes:
+            ao_ler(None)
+            return
+        # Back-pressure: espera o pool ter espaço (recortes pendentes, não veículos)
+        self.servico_ocr.esperar_vaga()
+        self.vagas.acquire()
+
+        def callback(placa, _recorte):
+            # Publica antes de liberar a vaga: a espera final em processar()
+            # só termina depois que o último resultado já está na fila
+            try:
+                ao_ler(placa)
+            finally:
+                self.vagas.release()
+
+        self.servico_ocr.ler_primeiro_valido(recortes, callback=callback)
+
+    def _publicar(self, nome, indice, segundos, trilha, tipo, placa):
+        self.fila_resultados.put({
+            "fonte": nome,
+            "frame": indice,
+            "tempo_video": None if segundos is None else round(segundos, 3),
+            "trilha": trilha,
+            "tipo": tipo,
+            "placa": placa,
+            "instante": self._instante(segundos),
+        })
+
+    def _gravar_resultados(self):
+        """Thread de saída: JSONL e/ou decisão no banco."""
+        arquivo = open(self.saida, "a", encoding="utf-8") if self.saida else None
+        db = BancoDeDados() if self.gravar_banco else None
+        try:
+            while True:
+                resultado = self.fila_resultados.get()
+                if resultado is None:
+                    break
+                instante = resultado.pop("instante")
+                if db:
+                    placa, _, status, _ = decidir_acesso(db, resultado["placa"], instante)
+                    resultado["placa"] = placa
+                    resultado["status"] = status
+                if arquivo:
+                    arquivo.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+                else:
+                    print(json.dumps(resultado, ensure_ascii=False))
+        finally:
+            if arquivo:
+                arquivo.close()
+            if db:
+                db.fechar()
+
+    def processar(self, fonte, passo=1, max_frames=None):
+        escritor = threading.Thread(target=self._gravar_resultados, name="resultados")
+        escritor.start()
+
+        pasta = os.path.isdir(fonte)
+        rastreador = None if pasta else RastreadorVeiculos()
+        trava_contagem = threading.Lock()
+
+        def contar_placa():
+            with trava_contagem:
+                self.placas += 1
+
+        inicio = time.perf_counter()
+        for indice, segundos, nome, frame in ler_fonte(fonte, passo, max_frames):
+            self.frames_lidos += 1
+            frame = self._redimensionar(frame)
+            deteccoes = detectar_veiculos(self.model, frame)
+
+            if pasta:
+                # Imagens soltas: cada veículo é lido uma vez. Sem veículo
+                # detectado (ex.: foto só da placa), lê a imagem inteira.
+                if not deteccoes:
+                    h, w = frame.shape[:2]
+                    deteccoes = [((0, 0, w, h), "--")]
+                for caixa, tipo in deteccoes:
+                    self.veiculos += 1
+
+                    def ao_ler(placa, nome=nome, indice=indice, tipo=tipo):
+                        if placa:
+                            contar_placa()
+                            self._publicar(nome, indice, None, None, tipo, placa)
+
+                    self._enviar_ocr(recortar(frame, caixa), ao_ler)
+                continue
+
+            # Vídeo: rastreia no tempo do vídeo e decide por votação, como na portaria
+            for trilha in rastreador.atualizar(deteccoes, agora=segundos):
+                if not rastreador.precisa_ocr(trilha, agora=segundos):
+                    continue
+                roi = recortar(frame, trilha.caixa)
+                if not roi.size:
+                    continue
+                rastreador.marcar_ocr(trilha, agora=segundos)
+
+                def ao_ler(placa, nome=nome, indice=indice, segundos=segundos, trilha=trilha):
+                    confirmada = rastreador.registrar_leitura(trilha.id, placa)
+                    if confirmada:
+                        contar_placa()
+                        self._publicar(nome, indice, segundos, trilha.id, trilha.tipo,
+                                       confirmada.placa_confirmada)
+
+                self._enviar_ocr(roi, ao_ler)
+
+        if rastreador:
+            self.veiculos = rastreador.proximo_id - 1
+
+        # Espera os OCRs pendentes terminarem
+        for _ in range(self.servico_ocr.processos * 2):
+            self.vagas.acquire()
+        duracao = time.perf_counter() - inicio
+
+        self.fila_resultados.put(None)
+        escritor.join()
+        self.servico_ocr.fechar()
+        self.relatorio(duracao)
+
+    def relatorio(self, duracao):
+        duracao = max(duracao, 1e-9)
+        print("-" * 30)
+        print(f"Frames processados: {self.frames_lidos} em {duracao:.1f}s "
+              f"({self.frames_lidos / duracao:.2f} frames/s)")
+        print(f"Veículos: {self.veiculos} | Placas lidas: {self.placas} "
+              f"({self.placas / duracao:.2f} placas/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconhecimento de placas em lote (sem tela).")
+    parser.add_argument("fonte", help="Arquivo de vídeo, URL (rtsp://, http://) ou pasta de imagens")
+    parser.add_argument("--passo", type=int, default=1, help="Processa 1 a cada N frames/imagens")
+    parser.add_argument("--max-frames", type=int, default=None, help="Para depois de N frames processados")
+    parser.add_argument("--largura", type=int, default=800, help="Redimensiona os frames para esta largura (0 = original)")
+    parser.add_argument("--saida", help="Arquivo JSONL de saída (padrão: imprime na tela)")
+    parser.add_argument("--gravar-banco", action="store_true", help="Decide o acesso e registra as entradas no banco")
+    parser.add_argument("--inicio", help="Horário do início da gravação (AAAA-MM-DD HH:MM:SS) para os registros")
+    parser.add_argument("--processos", type=int, default=NUM_PROCESSOS_OCR, help="Processos de OCR")
+    args = parser.parse_args()
+
+    inicio = datetime.strptime(args.inicio, "%Y-%m-%d %H:%M:%S") if args.inicio else None
+    processador = ProcessadorLote(args.saida, args.gravar_banco, inicio, args.processos, args.largura)
+    processador.processar(args.fonte, max(1, args.passo), args.max_frames)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import time
+import threading
+from collections import Counter
+
+# --- CONFIGURAÇÕES ---
+IOU_MINIMO = 0.3              # Sobreposição mínima para considerar o mesmo veículo
+DISTANCIA_CENTRO_MAX = 0.5    # Ou centro deslocado até 50% da diagonal da caixa
+TEMPO_SUMICO = 1.5            # Segundos sem aparecer até a trilha ser encerrada
+LEITURAS_VOTACAO = 3          # Janela de leituras (N) usada na votação
+MAX_LEITURAS = 8              # Leituras sem chegar à maioria até desistir da trilha
+INTERVALO_OCR_TRILHA = 0.5    # Intervalo mínimo entre dois OCRs da mesma trilha
+INTERVALO_OCR_MAX = 4.0       # Teto do intervalo quando a placa não sai (leituras falhas)
+MAX_FALHAS = 6                # Leituras falhas até desistir da trilha (placa ilegível ou encoberta)
+
+def iou(a, b):
+    """Interseção sobre união de duas caixas (x1, y1, x2, y2)."""
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0, ix2 - ix1) * max(0, iy2 - iy1)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[3] - a[1])
+    area_b = (b[2] - b[0]) * (b[3] - b[1])
+    return inter / float(area_a + area_b - inter)
+
+def distancia_centros(a, b):
+    """Distância entre os centros, normalizada pela diagonal da caixa 'a'."""
+    cax, cay = (a[0] + a[2]) / 2, (a[1] + a[3]) / 2
+    cbx, cby = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+    diagonal = max(1.0, ((a[2] - a[0]) ** 2 + (a[3] - a[1]) ** 2) ** 0.5)
+    return (((cax - cbx) ** 2 + (cay - cby) ** 2) ** 0.5) / diagonal
+
+class Trilha:
+    """Um veículo acompanhado ao longo dos frames."""
+
+    def __init__(self, id_trilha, caixa, tipo, agora):
+        self.id = id_trilha
+        self.caixa = caixa
+        self.tipo = tipo
+        self.ultimo_visto = agora
+        self.votos = Counter()
+        self.leituras = 0
+        self.falhas = 0
+        self.placa_confirmada = None
+        self.abandonada = False         # Desistiu do OCR: não força mais o YOLO nem o OCR
+        self.ocr_em_andamento = False
+        self.ultimo_ocr = float("-inf") # Trilha nova: OCR imediato
+
+    @property
+    def resolvida(self):
+        return self.placa_confirmada is not None
+
+class RastreadorVeiculos:
+    """
+    Rastreador leve por IoU/centro em cima das caixas do YOLO. Dá um ID para
+    cada veículo, diz quando vale a pena rodar OCR nele e confirma a placa por
+    maioria de votos. É seguro chamar de threads diferentes.
+    """
+
+    def __init__(self, iou_minimo=IOU_MINIMO, tempo_sumico=TEMPO_SUMICO,
+                 leituras_votacao=LEITURAS_VOTACAO, max_leituras=MAX_LEITURAS,
+                 intervalo_ocr=INTERVALO_OCR_TRILHA, max_falhas=MAX_FALHAS):
+        self.iou_minimo = iou_minimo
+        self.tempo_sumico = tempo_sumico
+        self.votos_necessarios = leituras_votacao // 2 + 1
+        self.max_leituras = max_leituras
+        self.intervalo_ocr = intervalo_ocr
+        self.max_falhas = max_falhas
+        self.trilhas = {}
+        self.proximo_id = 1
+        self.trava = threading.Lock()
+
+    def atualizar(self, deteccoes, agora=None):
+        """
+        Associa as detecções do frame [(caixa, tipo), ...] às trilhas existentes.
+        Retorna a lista de trilhas ativas, na mesma ordem das detecções.
+        """
+        agora = time.time() if agora is None else agora
+        with self.trava:
+            # Pares candidatos (score, trilha, detecção), melhores primeiro
+            pares = []
+            for id_trilha, trilha in self.trilhas.items():
+                for i, (caixa, _) in enumerate(deteccoes):
+                    sobreposicao = iou(trilha.caixa, caixa)
+                    if sobreposicao >= self.iou_minimo:
+                        pares.append((1.0 + sobreposicao, id_trilha, i))
+                    elif distancia_centros(trilha.caixa, caixa) <= DISTANCIA_CENTRO_MAX:
+                        pares.append((1.0 - distancia_centros(trilha.caixa, caixa), id_trilha, i))
+            pares.sort(reverse=True)
+
+            resultado = [None] * len(deteccoes)
+            trilhas_usadas = set()
+            for _, id_trilha, i in pares:
+                if id_trilha in trilhas_usadas or resultado[i] is not None:
+                    continue
+                trilha = self.trilhas[id_trilha]
+                trilha.caixa, trilha.tipo = deteccoes[i]
+                trilha.ultimo_visto = agora
+                trilhas_usadas.add(id_trilha)
+                resultado[i] = trilha
+
+            # Detecções sem par viram trilhas novas
+            for i, (caixa, tipo) in enumerate(deteccoes):
+                if resultado[i] is None:
+                    trilha = Trilha(self.proximo_id, caixa, tipo, agora)
+                    self.trilhas[trilha.id] = trilha
+                    self.proximo_id += 1
+                    resultado[i] = trilha
+
+            # Encerra quem sumiu da cena
+            for id_trilha in [t.id for t in self.trilhas.values()
+                              if agora - t.ultimo_visto > self.tempo_sumico]:
+                del self.trilhas[id_trilha]
+
+            return resultado
+
+    def manter_trilhas(self, agora=None):
+        """
+        Cena parada (o YOLO não rodou): quem estava na imagem continua lá.
+        Evita que um carro parado perca a trilha e seja lido de novo.
+        """
+        agora = time.time() if agora is None else agora
+        with self.trava:
+            for trilha in self.trilhas.values():
+                trilha.ultimo_visto = agora
+
+    def pendentes(self, agora=None):
+        """
+        True se há veículo na cena esperando um OCR agora. Trilhas em espera
+        (backoff depois de leituras falhas) ou abandonadas não contam: um carro
+        parado com a placa ilegível não mantém o YOLO rodando.
+        """
+        agora = time.time() if agora is None else agora
+        with self.trava:
+            return any(self._ocr_devido(t, agora) for t in self.trilhas.values())
+
+    def precisa_ocr(self, trilha, agora=None):
+        """Só trilhas novas ou ainda sem placa confirmada, sem OCR pendente."""
+        agora = time.time() if agora is None else agora
+        with self.trava:
+            return self._ocr_devido(trilha, agora)
+
+    def _ocr_devido(self, trilha, agora):
+        # Cada leitura falha dobra a espera (placa ilegível não ocupa o OCR sem parar)
+        intervalo = min(self.intervalo_ocr * (2 ** trilha.falhas), INTERVALO_OCR_MAX)
+        return (not trilha.resolvida
+                and not trilha.abandonada
+                and not trilha.ocr_em_andamento
+                and agora - trilha.ultimo_ocr >= intervalo)
+
+    def marcar_ocr(self, trilha, agora=None):
+        """Anota que um OCR foi enviado para a trilha."""
+        with self.trava:
+            trilha.ocr_em_andamento = True
+            trilha.ultimo_ocr = time.time() if agora is None else agora
+
+    def registrar_leitura(self, id_trilha, placa):
+        """
+        Conta o voto de uma leitura de OCR (placa pode ser None).
+        Retorna a trilha quando a placa acaba de ser confirmada; senão None.
+        """
+        with self.trava:
+            trilha = self.trilhas.get(id_trilha)
+            if trilha is None:
+                return None # Veículo já saiu de cena
+            trilha.ocr_em_andamento = False
+            if trilha.resolvida:
+                return None
+            if not placa:
+                trilha.falhas += 1
+                trilha.abandonada = trilha.falhas >= self.max_falhas
+                return None
+
+            trilha.votos[placa] += 1
+            trilha.leituras += 1
+            mais_votada, votos = trilha.votos.most_common(1)[0]
+
+            if votos >= self.votos_necessarios:
+                trilha.placa_confirmada = mais_votada
+                return trilha
+            if trilha.leituras >= self.max_leituras:
+                # Leituras demais sem maioria (cada uma deu uma placa): não
+                # decide com um voto só, desiste da trilha
+                trilha.abandonada = True
+            return None
@@ -0,0 +1,49 @@
+from detector import carregar_detector
+
+# Partes do reconhecimento que não dependem de câmera nem de tela, usadas
+# tanto pela portaria (main.py) quanto pelo processamento em lote.
+
+CONFIANCA_YOLO = 0.5
+
+def detectar_veiculos(detector, frame, conf=CONFIANCA_YOLO):
+    """Roda o YOLO e devolve [((x1, y1, x2, y2), tipo), ...] só dos veículos."""
+    return detectar_veiculos_lote(detector, [frame], conf)[0]
+
+def detectar_veiculos_lote(detector, frames, conf=CONFIANCA_YOLO):
+    """
+    Uma única inferência do YOLO para vários frames (ex.: uma câmera por
+    faixa). Devolve uma lista de detecções por frame, na mesma ordem.
+    """
+    return detector.detectar(frames, conf)
+
+def recortar(frame, caixa):
+    """Recorte da caixa, limitado às bordas do frame."""
+    h, w = frame.shape[:2]
+    x1, y1, x2, y2 = caixa
+    return frame[max(0, y1):min(h, y2), max(0, x1):min(w, x2)]
+
+def decidir_acesso(db, placa_lida_texto, instante=None, evidencia=None):
+    """
+    Consulta o banco, decide o acesso e registra a decisão ('evidencia':
+    ver BancoDeDados.registrar_acesso).
+    Retorna (placa, info_veiculo_db, status, registrado); 'registrado' é False
+    quando a placa já tinha passado dentro da janela de repetição.
+    """
+    info = db.buscar_veiculo(placa_lida_texto)
+    if info is None:
+        # OCR pode ter trocado um caractere (O/0, I/1, B/8...)
+        info, _ = db.buscar_veiculo_aproximado(placa_lida_texto)
+        if info:
+            placa_lida_texto = info['placa']
+
+    if info:
+        if info['status'] == 'AUTORIZADO':
+            status = "AUTORIZADO"
+        else:
+            status = "BLOQUEADO"
+    else:
+        status = "NAO CADASTRADO"
+
+    # Tentativas negadas também ficam registradas (relatórios e resumos por decisão)
+    registrado = db.registrar_acesso(placa_lida_texto, instante, status, evidencia)
+    return placa_lida_texto, info, status, registrado
@@ -0,0 +1,107 @@
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from resumos import atualizar_resumos
+
+# --- CONFIGURAÇÕES ---
+INTERVALO_GRAVACAO = 1.0      # Segundos entre gravações em lote
+TAMANHO_LOTE = 200            # Ou grava antes, se juntar isso de eventos
+JANELA_REPETICAO = 60.0       # Mesma placa dentro da janela conta como um acesso só
+TAMANHO_FILA = 10000          # Eventos pendentes em memória (protege a RAM se o disco travar)
+
+class EscritorAcessos:
+    """
+    Grava os acessos em segundo plano (write-behind). A portaria só coloca o
+    evento numa fila; uma thread junta os eventos e grava tudo com um único
+    executemany/commit por intervalo ou por lote.
+    """
+
+    def __init__(self, caminho, intervalo=INTERVALO_GRAVACAO, tamanho_lote=TAMANHO_LOTE,
+                 janela_repeticao=JANELA_REPETICAO):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.janela_repeticao = janela_repeticao
+
+        self._fila = queue.Queue(maxsize=TAMANHO_FILA)
+        self._ultima_vez = {}  # placa -> instante do último acesso aceito
+        self._trava = threading.Lock() # Protege a janela de repetição e a entrada na fila
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="registro-acessos", daemon=True)
+        self._thread.start()
+
+    def registrar(self, placa, instante=None, status="AUTORIZADO", evidencia=None):
+        """
+        Enfileira um acesso com a decisão tomada. Retorna False se a placa já
+        foi registrada dentro da janela de repetição (ou se a fila estiver cheia).
+        'evidencia', se passada, é chamada como evidencia(placa, instante) só
+        para acessos que entram na fila e devolve a chave das imagens.
+        """
+        instante = time.time() if instante is None else instante
+        placa = placa.upper()
+
+        with self._trava:
+            ultima = self._ultima_vez.get(placa)
+            if ultima is not None and instante - ultima < self.janela_repeticao:
+                return False
+            # Só quem segura a trava coloca na fila e a thread de gravação só
+            # tira: com vaga agora, o put_nowait abaixo não falha. Acesso
+            # descartado não agenda imagens nem conta para a janela de repetição.
+            if self._fila.full():
+                print(f"[acessos] Fila cheia, acesso de {placa} descartado")
+                return False
+
+            data_hora = datetime.fromtimestamp(instante).strftime("%Y-%m-%d %H:%M:%S")
+            chave_evidencia = evidencia(placa, instante) if evidencia else None
+            self._fila.put_nowait((placa, data_hora, status, chave_evidencia))
+
+            self._ultima_vez[placa] = instante
+            if len(self._ultima_vez) > 1000:
+                self._limpar_repeticoes(instante)
+        return True
+
+    def _limpar_repeticoes(self, agora):
+        for placa in [p for p, t in self._ultima_vez.items() if agora - t >= self.janela_repeticao]:
+            del self._ultima_vez[placa]
+
+    def _executar(self):
+        conn = sqlite3.connect(self.caminho)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while not self._parar.is_set() or not self._fila.empty():
+                lote = self._juntar_lote()
+                if lote:
+                    self._gravar(conn, lote)
+        finally:
+            conn.close()
+
+    def _juntar_lote(self):
+        """Espera até o intervalo acabar ou o lote encher."""
+        lote = []
+        limite = time.monotonic() + self.intervalo
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0 or (self._parar.is_set() and self._fila.empty()):
+                break
+            try:
+                lote.append(self._fila.get(timeout=min(restante, 0.1)))
+            except queue.Empty:
+                continue
+        return lote
+
+    def _gravar(self, conn, lote):
+        try:
+            with conn: # Uma transação (e um sync de disco) para o lote inteiro, resumos incluídos
+                conn.executemany("INSERT INTO acessos (placa, data_hora, status, evidencia) VALUES (?, ?, ?, ?)", lote)
+                atualizar_resumos(conn)
+        except sqlite3.Error as e:
+            print(f"[acessos] Falha ao gravar {len(lote)} acessos: {e}")
+
+    def fechar(self):
+        """Grava o que ainda estiver na fila e encerra a thread."""
+        self._parar.set()
+        self._thread.join(timeout=10)
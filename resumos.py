@@ -0,0 +1,109 @@
+"""
+Resumos (rollups) dos acessos: contagem por hora e por dia, separada por
+tipo, categoria e decisão. Os gráficos do dashboard leem estas poucas linhas
+em vez de varrer o histórico inteiro de 'acessos'.
+
+A atualização é incremental: 'acessos_resumo_controle' guarda o último id já
+somado e cada chamada soma só os acessos novos (o EscritorAcessos chama na
+mesma transação em que grava o lote). Para recalcular tudo (inclusive os
+meses arquivados):
+    python resumos.py --reconstruir
+"""
+import argparse
+
+from arquivamento import meses_arquivados, anexar_particao
+
+# Granularidades mantidas: nome -> formato do início do período (strftime do SQLite)
+PERIODOS = {
+    "hora": "%Y-%m-%d %H:00",
+    "dia": "%Y-%m-%d",
+}
+
+def criar_tabelas_resumo(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS acessos_resumo (
+            periodo TEXT,     -- 'hora' ou 'dia'
+            inicio TEXT,      -- '2026-03-01 07:00' (hora) ou '2026-03-01' (dia)
+            tipo TEXT,        -- Tipo cadastrado ('--' se a placa não tem cadastro)
+            categoria TEXT,
+            status TEXT,      -- Decisão: AUTORIZADO, BLOQUEADO ou NAO CADASTRADO
+            total INTEGER,
+            PRIMARY KEY (periodo, inicio, tipo, categoria, status)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS acessos_resumo_controle (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            ultimo_id INTEGER   -- Maior acessos.id já somado nos resumos
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO acessos_resumo_controle (id, ultimo_id) VALUES (1, 0)")
+
+def atualizar_resumos(conn):
+    """
+    Soma nos resumos os acessos com id maior que o último processado.
+    Não faz commit: roda dentro da transação de quem chamou. Retorna quantos
+    acessos foram somados.
+    """
+    ultimo_id = conn.execute("SELECT ultimo_id FROM acessos_resumo_controle WHERE id = 1").fetchone()[0]
+    novo_ultimo, quantidade = conn.execute(
+        "SELECT COALESCE(MAX(id), ?), COUNT(*) FROM acessos WHERE id > ?", (ultimo_id, ultimo_id)).fetchone()
+    if not quantidade:
+        return 0
+
+    _somar(conn, "acessos", "a.id > ? AND a.id <= ?", (ultimo_id, novo_ultimo))
+    conn.execute("UPDATE acessos_resumo_controle SET ultimo_id = ? WHERE id = 1", (novo_ultimo,))
+    return quantidade
+
+def _somar(conn, tabela, condicao, params):
+    """Soma nos resumos os acessos de 'tabela' que atendem à condição."""
+    for periodo, formato in PERIODOS.items():
+        conn.execute(f"""
+            INSERT INTO acessos_resumo (periodo, inicio, tipo, categoria, status, total)
+            SELECT ?, strftime('{formato}', a.data_hora),
+                   COALESCE(v.tipo, '--'), COALESCE(v.categoria, '--'), a.status, COUNT(*)
+            FROM {tabela} a
+            LEFT JOIN veiculos v ON v.placa = a.placa
+            WHERE {condicao}
+            GROUP BY 2, 3, 4, 5
+            ON CONFLICT (periodo, inicio, tipo, categoria, status)
+            DO UPDATE SET total = total + excluded.total
+        """, (periodo, *params))
+
+def reconstruir_resumos(conn):
+    """
+    Apaga os resumos e soma de novo todos os acessos: a tabela quente e os
+    meses arquivados. Retorna quantos foram somados.
+    """
+    with conn:
+        conn.execute("DELETE FROM acessos_resumo")
+        conn.execute("UPDATE acessos_resumo_controle SET ultimo_id = 0 WHERE id = 1")
+        total = atualizar_resumos(conn)
+
+    for mes in meses_arquivados():
+        with anexar_particao(conn, mes) as tabela:
+            with conn:
+                _somar(conn, tabela, "1", ())
+                total += conn.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+    return total
+
+def main():
+    from banco_dados import BancoDeDados, ARQUIVO_BANCO
+
+    parser = argparse.ArgumentParser(description="Resumos (por hora/dia) dos acessos.")
+    parser.add_argument("--banco", default=ARQUIVO_BANCO)
+    parser.add_argument("--reconstruir", action="store_true", help="Recalcula os resumos do zero")
+    args = parser.parse_args()
+
+    db = BancoDeDados(args.banco) # Garante as tabelas
+    try:
+        if args.reconstruir:
+            print(f"{reconstruir_resumos(db.conn)} acessos resumidos.")
+        else:
+            with db.conn:
+                print(f"{atualizar_resumos(db.conn)} acessos novos resumidos.")
+    finally:
+        db.fechar()
+
+if __name__ == "__main__":
+    main()
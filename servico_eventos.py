@@ -0,0 +1,245 @@
+"""
+Serviço local de eventos da portaria (asyncio, só biblioteca padrão).
+
+Roda numa thread do main.py com o seu próprio event loop. A decisão de cada
+acesso é publicada na hora (sem esperar a gravação em lote no SQLite) e
+entregue a quem estiver assinando, por Server-Sent Events:
+
+    GET  /eventos           stream SSE; cada acesso é um 'event: acesso' com JSON
+                            (reconectando com Last-Event-ID, os perdidos são reenviados)
+    GET  /placas/ABC1234    consulta rápida no cadastro (o mesmo cache em memória que a
+                            portaria usa para decidir; se não achar, a placa mais parecida)
+    POST /placas            cadastra um veículo (JSON com placa, proprietario, tipo,
+                            categoria e status)
+
+Dashboard, cancela e outras integrações assinam /eventos em vez de consultar o
+banco em loop. Exemplo:
+    curl -N http://127.0.0.1:8765/eventos
+"""
+import asyncio
+import json
+import os
+import threading
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+from banco_dados import BancoDeDados, normalizar_veiculo
+
+# --- CONFIGURAÇÕES ---
+PORTA_EVENTOS = int(os.environ.get("EVENTOS_PORTA", "8765"))  # 0 desliga o serviço
+HISTORICO_EVENTOS = 200     # Últimos eventos guardados para reenviar a quem reconecta
+FILA_ASSINANTE = 100        # Eventos pendentes por assinante (lento perde os mais antigos)
+INTERVALO_PING = 2.0        # Segundos; mantém a conexão viva e deixa o cliente reagir
+TEMPO_LEITURA = 10.0        # Segundos para o cliente mandar o pedido
+MAX_CORPO = 64 * 1024       # Bytes aceitos no corpo do POST
+
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           409: "Conflict", 413: "Payload Too Large"}
+
+class ServicoEventos:
+    """Event loop próprio numa thread; publicar() pode ser chamado de qualquer thread."""
+
+    def __init__(self, banco, porta=PORTA_EVENTOS):
+        self.banco = banco  # BancoDeDados da portaria: as consultas usam o cache dele
+        self.porta = porta
+        self._loop = None
+        self._servidor = None
+        self._assinantes = set()                      # Uma asyncio.Queue por conexão SSE
+        self._historico = deque(maxlen=HISTORICO_EVENTOS)
+        self._proximo_id = 1
+        self._iniciado = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="eventos", daemon=True)
+        # Consultas e cadastros rodam fora do event loop, numa thread só: o
+        # cadastro tem conexão de escrita própria (o SQLite fica preso à thread)
+        self._executor_banco = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eventos-banco")
+        self._escrita = None
+
+    def iniciar(self):
+        if not self.porta:
+            return
+        self._thread.start()
+        self._iniciado.wait(timeout=5)
+
+    def publicar(self, evento):
+        """Entrega um evento (dict) aos assinantes. Não bloqueia quem chama."""
+        if self._servidor is None:
+            return
+        self._loop.call_soon_threadsafe(self._distribuir, evento)
+
+    def fechar(self):
+        if self._loop is not None and self._loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(self._encerrar(), self._loop).result(timeout=5)
+            except Exception as e:
+                print(f"[eventos] Falha ao encerrar as conexões: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+        if self._escrita is not None:
+            self._executor_banco.submit(self._escrita.fechar).result()
+        self._executor_banco.shutdown(wait=True)
+
+    # --- EVENT LOOP ---
+
+    def _executar(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._servidor = self._loop.run_until_complete(
+                asyncio.start_server(self._atender, "127.0.0.1", self.porta))
+        except OSError as e:
+            print(f"[eventos] Serviço desligado (porta {self.porta}): {e}")
+            self._iniciado.set()
+            return
+        self._iniciado.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._servidor.close()
+            self._loop.close()
+
+    async def _encerrar(self):
+        """Fecha o servidor e cancela as conexões abertas (streams SSE e pedidos em curso)."""
+        self._servidor.close()
+        tarefas = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        await self._servidor.wait_closed()
+
+    def _distribuir(self, evento):
+        """Roda no event loop: numera, guarda no histórico e enfileira para cada assinante."""
+        item = (self._proximo_id, evento)
+        self._proximo_id += 1
+        self._historico.append(item)
+        for fila in self._assinantes:
+            if fila.full():
+                fila.get_nowait() # Assinante atrasado: descarta o mais antigo
+            fila.put_nowait(item)
+
+    async def _atender(self, leitor, escritor):
+        try:
+            linha = await asyncio.wait_for(leitor.readline(), TEMPO_LEITURA)
+            metodo, alvo, _ = linha.decode("latin-1").split(" ", 2)
+            cabecalhos = {}
+            while True:
+                linha = await asyncio.wait_for(leitor.readline(), TEMPO_LEITURA)
+                if linha in (b"\r\n", b"\n", b""):
+                    break
+                nome, _, valor = linha.decode("latin-1").partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+
+            tamanho = int(cabecalhos.get("content-length") or 0)
+            if tamanho > MAX_CORPO:
+                await self._responder(escritor, 413, {"erro": "corpo grande demais"})
+                return
+            corpo = await leitor.readexactly(tamanho) if tamanho else b""
+
+            rota = urlsplit(alvo).path.rstrip("/")
+            if metodo == "GET" and rota == "/eventos":
+                await self._transmitir(escritor, cabecalhos.get("last-event-id"))
+            elif metodo == "GET" and rota.startswith("/placas/"):
+                codigo, dados = await self._no_banco(self._consultar_placa, unquote(rota[len("/placas/"):]))
+                await self._responder(escritor, codigo, dados)
+            elif metodo == "POST" and rota == "/placas":
+                codigo, dados = await self._no_banco(self._cadastrar_placa, corpo)
+                await self._responder(escritor, codigo, dados)
+            else:
+                await self._responder(escritor, 404, {"erro": "rota inexistente"})
+        except (ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass # Pedido malformado ou cliente que desconectou
+        except asyncio.CancelledError:
+            pass # Serviço encerrando (_encerrar): a conexão termina normalmente
+        finally:
+            escritor.close()
+
+    async def _responder(self, escritor, codigo, dados):
+        corpo = json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {codigo} {MOTIVOS[codigo]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corpo)}\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1") + corpo)
+        await escritor.drain()
+
+    async def _transmitir(self, escritor, ultimo_id):
+        """Stream SSE até o cliente desconectar."""
+        fila = asyncio.Queue(maxsize=FILA_ASSINANTE)
+        if ultimo_id and ultimo_id.isdigit():
+            perdidos = [item for item in self._historico if item[0] > int(ultimo_id)]
+            for item in perdidos[-FILA_ASSINANTE:]:
+                fila.put_nowait(item)
+        self._assinantes.add(fila)
+        try:
+            escritor.write(b"HTTP/1.1 200 OK\r\n"
+                           b"Content-Type: text/event-stream; charset=utf-8\r\n"
+                           b"Cache-Control: no-cache\r\n"
+                           b"Connection: keep-alive\r\n\r\n"
+                           b"retry: 1000\n\n")
+            await escritor.drain()
+            while True:
+                try:
+                    id_evento, evento = await asyncio.wait_for(fila.get(), INTERVALO_PING)
+                except asyncio.TimeoutError:
+                    escritor.write(b": ping\n\n")
+                else:
+                    dados = json.dumps(evento, ensure_ascii=False)
+                    escritor.write(f"id: {id_evento}\nevent: acesso\ndata: {dados}\n\n".encode("utf-8"))
+                await escritor.drain()
+        finally:
+            self._assinantes.discard(fila)
+
+    # --- CADASTRO (na thread do banco) ---
+
+    async def _no_banco(self, funcao, *args):
+        return await self._loop.run_in_executor(self._executor_banco, funcao, *args)
+
+    def _consultar_placa(self, placa):
+        db = self.banco
+        placa = placa.upper().replace("-", "").replace(" ", "")
+        info, confianca = db.buscar_veiculo(placa), 1.0
+        if info is None:
+            info, confianca = db.buscar_veiculo_aproximado(placa)
+        if info is None:
+            return 404, {"placa": placa, "status": "NAO CADASTRADO"}
+        return 200, {"placa": info.placa, "proprietario": info.proprietario, "tipo": info.tipo,
+                     "categoria": info.categoria, "status": info.status, "confianca": round(confianca, 2)}
+
+    def _cadastrar_placa(self, corpo):
+        try:
+            registro = json.loads(corpo or b"{}")
+        except ValueError:
+            return 400, {"erro": "JSON inválido"}
+        if not isinstance(registro, dict):
+            return 400, {"erro": "esperado um objeto JSON"}
+        linha, motivo = normalizar_veiculo(registro)
+        if motivo:
+            return 400, {"erro": motivo}
+        if self._escrita is None:
+            # Só para gravar: o cache desta instância nunca é carregado
+            self._escrita = BancoDeDados(self.banco.caminho)
+        if not self._escrita.cadastrar_veiculo(*linha):
+            return 409, {"erro": f"placa {linha[0]} já cadastrada"}
+        self.banco.atualizar_cache(self._escrita.conn) # Já aparece nas consultas e decisões
+        return 201, dict(zip(("placa", "proprietario", "tipo", "categoria", "status"), linha))
+
+# --- CLIENTE ---
+
+def assinar(porta=PORTA_EVENTOS, tempo_limite=INTERVALO_PING * 3):
+    """
+    Cliente SSE mínimo (usado pelo dashboard): gera um dict por evento e None
+    a cada ping. Levanta OSError se o serviço não responder ou a conexão cair.
+    """
+    with urllib.request.urlopen(f"http://127.0.0.1:{porta}/eventos", timeout=tempo_limite) as resposta:
+        dados = []
+        for linha in resposta:
+            linha = linha.decode("utf-8").rstrip("\r\n")
+            if linha.startswith(":"):
+                yield None # Ping
+            elif linha.startswith("data:"):
+                dados.append(linha[5:].lstrip())
+            elif not linha and dados:
+                yield json.loads("\n".join(dados))
+                dados = []
+    raise ConnectionError("stream de eventos encerrado")
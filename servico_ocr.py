@@ -0,0 +1,182 @@
+import os
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, Future
+
+import cv2
+import numpy as np
+
+from decodificador_placa import decodificar, ALLOWLIST, CONFIANCA_MINIMA, CONFIANCA_SAIDA
+
+# --- CONFIGURAÇÕES ---
+# Quantidade de processos de OCR. Cada um carrega o seu próprio EasyOCR, então
+# leituras de recortes diferentes rodam em paralelo, em núcleos diferentes.
+NUM_PROCESSOS_OCR = int(os.environ.get("OCR_PROCESSOS", max(1, (os.cpu_count() or 2) // 2)))
+IDIOMAS_OCR = ['pt']
+USAR_GPU = False # Mude para True se tiver placa de vídeo NVIDIA
+
+# Leitor do processo atual (cada worker carrega o seu uma única vez)
+_reader = None
+
+def _inicializar_worker(idiomas, gpu, threads_torch):
+    """Roda uma vez em cada processo do pool: carrega o EasyOCR."""
+    global _reader
+    import easyocr
+    import torch
+
+    # Divide os núcleos entre os workers para eles não brigarem entre si
+    torch.set_num_threads(threads_torch)
+    _reader = easyocr.Reader(idiomas, gpu=gpu)
+
+def variacoes_imagem(img_recorte):
+    """
+    Versões pré-processadas do recorte, da que costuma funcionar melhor para
+    a pior. Geradas sob demanda: se a primeira já dá uma leitura boa, as
+    outras nem são calculadas.
+    """
+    gray = cv2.cvtColor(img_recorte, cv2.COLOR_BGR2GRAY)
+
+    # Aumenta contraste para ajudar na leitura
+    yield cv2.equalizeHist(gray)
+
+    # Contraste local: placa com sombra ou reflexo de farol em parte dela
+    yield cv2.createCLAHE(clipLimit=2.0, tileGridSize=(4, 4)).apply(gray)
+
+    # Preto e branco puro: placa suja/desbotada
+    _, binaria = cv2.threshold(cv2.GaussianBlur(gray, (3, 3), 0), 0, 255,
+                               cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    yield binaria
+
+def processar_ocr_inteligente(img_recorte):
+    """
+    Tenta ler a placa. Cada variação da imagem passa pelo OCR (só letras e
+    dígitos) e os fragmentos lidos são decodificados no formato de placa
+    (antiga ou Mercosul, juntando as duas linhas da placa de moto). Para na
+    primeira leitura confiável; senão fica com a melhor entre as variações.
+    Roda dentro do processo worker, usando o leitor carregado nele.
+    """
+    melhor, melhor_confianca = None, 0.0
+    for imagem in variacoes_imagem(img_recorte):
+        result = _reader.readtext(imagem, allowlist=ALLOWLIST)
+        placa, confianca = decodificar(result)
+        if confianca > melhor_confianca:
+            melhor, melhor_confianca = placa, confianca
+        if melhor_confianca >= CONFIANCA_SAIDA:
+            break # Achou com folga: não gasta OCR nas outras variações
+
+    return melhor if melhor_confianca >= CONFIANCA_MINIMA else None
+
+def _aquecer_worker():
+    """Primeira leitura de mentira: paga a carga do modelo antes do primeiro veículo."""
+    processar_ocr_inteligente(np.full((60, 200, 3), 255, dtype=np.uint8))
+    return os.getpid()
+
+class ServicoOCR:
+    """
+    Pool de processos de OCR. O chamador envia recortes e recebe Futures
+    (ou callbacks) de volta, sem travar a thread que chamou.
+    Conta os recortes ainda no pool: quem envia consulta tem_vaga() (ou espera
+    em esperar_vaga()) para o trabalho velho não se acumular.
+    """
+
+    def __init__(self, processos=NUM_PROCESSOS_OCR, idiomas=IDIOMAS_OCR, gpu=USAR_GPU, max_pendentes=None):
+        self.processos = processos
+        self.max_pendentes = max_pendentes or processos # Recortes no pool (na fila ou lendo)
+        self._pendentes = 0
+        self._trava = threading.Condition()
+        threads_torch = max(1, (os.cpu_count() or 1) // processos)
+        # 'spawn' evita herdar threads/estado do torch do processo principal
+        contexto = multiprocessing.get_context("spawn")
+        self.executor = ProcessPoolExecutor(
+            max_workers=processos,
+            mp_context=contexto,
+            initializer=_inicializar_worker,
+            initargs=(list(idiomas), gpu, threads_torch),
+        )
+
+    def _enviar(self, img_recorte):
+        with self._trava:
+            self._pendentes += 1
+        futuro = self.executor.submit(processar_ocr_inteligente, img_recorte)
+        futuro.add_done_callback(self._terminou) # Também chamado quando o Future é cancelado
+        return futuro
+
+    def _terminou(self, _):
+        with self._trava:
+            self._pendentes -= 1
+            self._trava.notify_all()
+
+    def tem_vaga(self):
+        """True se o pool tem menos recortes pendentes que o limite."""
+        return self._pendentes < self.max_pendentes
+
+    def esperar_vaga(self, timeout=None):
+        """Bloqueia até haver vaga no pool. Retorna False se o tempo acabar."""
+        with self._trava:
+            return self._trava.wait_for(self.tem_vaga, timeout)
+
+    def submeter(self, img_recorte, callback=None):
+        """Envia um recorte para leitura. Retorna um Future com a placa (ou None)."""
+        futuro = self._enviar(img_recorte)
+        if callback:
+            futuro.add_done_callback(lambda f: callback(_resultado_ou_none(f)))
+        return futuro
+
+    def ler_primeiro_valido(self, recortes, callback=None):
+        """
+        Lê vários recortes em paralelo (ex.: regiões candidatas de placa) e
+        resolve com a primeira placa válida, respeitando a ordem de prioridade
+        da lista. Retorna um Future com a placa; o callback recebe (placa,
+        recorte), onde recorte é o que foi lido (None se nenhum deu placa).
+        Decidido o resultado, os recortes que ainda nem começaram a ser lidos
+        são cancelados.
+        """
+        futuros = [self._enviar(r) for r in recortes]
+        resultado = Future()
+        vencedor = [None] # Recorte que deu a placa, para o callback
+        decisao = threading.Lock()
+
+        def verificar(_):
+            if resultado.done():
+                return
+            # Percorre na ordem de prioridade: só decide quando os anteriores terminaram
+            for recorte, f in zip(recortes, futuros):
+                if not f.done():
+                    return
+                placa = _resultado_ou_none(f)
+                if placa:
+                    break
+            else:
+                placa, recorte = None, None
+            with decisao:
+                if resultado.done():
+                    return # Outro callback já resolveu
+                vencedor[0] = recorte # Antes do set_result, que já chama o callback
+                resultado.set_result(placa)
+            for f in futuros:
+                f.cancel() # Só tem efeito nos que ainda estão na fila
+
+        for f in futuros:
+            f.add_done_callback(verificar)
+
+        if callback:
+            resultado.add_done_callback(lambda f: callback(f.result(), vencedor[0]))
+        return resultado
+
+    def aquecer(self):
+        """
+        Sobe todos os processos (cada um carrega o EasyOCR) e faz uma leitura
+        em cada. Bloqueia até terminar.
+        """
+        futuros = [self.executor.submit(_aquecer_worker) for _ in range(self.processos)]
+        for f in futuros:
+            f.result()
+
+    def fechar(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def _resultado_ou_none(futuro):
+    """Resultado do Future, tratando cancelamento/erro do worker como leitura falha."""
+    if futuro.cancelled() or futuro.exception() is not None:
+        return None
+    return futuro.result()
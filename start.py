@@ -2,13 +2,20 @@ import subprocess
 import time
 import os
 import sys
+import urllib.request
 
 # Definição dos nomes dos arquivos
 ARQUIVO_BANCO = "sistema_campus.db"
 SCRIPT_POPULAR = "dml.py"     # Seu script de insert inicial
+SCRIPT_ARQUIVAMENTO = "arquivamento.py"
 SCRIPT_DASHBOARD = "dashboard.py"
 SCRIPT_PRINCIPAL = "main.py"
 
+# Sinais de prontidão
+ARQUIVO_PRONTO = "portaria.pronta"                         # Criado pelo main.py (mesmo nome do PORTARIA_PRONTA)
+URL_SAUDE_DASHBOARD = "http://localhost:8501/_stcore/health"
+TEMPO_MAXIMO_ESPERA = 180   # Segundos (a primeira partida pode baixar/exportar modelos)
+
 def verificar_instalacao():
     """
     Verifica se o banco existe. Se não, roda o script de população.
@@ -24,25 +31,53 @@ def verificar_instalacao():
             print(f"Erro ao rodar script de população: {e}")
     else:
         print("Banco de dados encontrado. Sistema pronto.")
+        # Retenção: tira do banco principal os acessos mais antigos que o horizonte
+        subprocess.run([sys.executable, SCRIPT_ARQUIVAMENTO])
     print("-" * 30)
 
+def dashboard_respondendo():
+    try:
+        with urllib.request.urlopen(URL_SAUDE_DASHBOARD, timeout=1) as resposta:
+            return resposta.status == 200
+    except OSError:
+        return False
+
+def aguardar(descricao, pronto, processo):
+    """Consulta 'pronto()' até dar certo, o processo morrer ou estourar o tempo."""
+    inicio = time.time()
+    while time.time() - inicio < TEMPO_MAXIMO_ESPERA:
+        if pronto():
+            print(f"{descricao} pronto em {time.time() - inicio:.1f}s.")
+            return True
+        if processo.poll() is not None:
+            print(f"{descricao} encerrou antes de ficar pronto (código {processo.returncode}).")
+            return False
+        time.sleep(0.2)
+    print(f"{descricao} não ficou pronto em {TEMPO_MAXIMO_ESPERA}s.")
+    return False
+
 def iniciar_sistema():
     # 1. Verifica se precisa criar o banco
     verificar_instalacao()
 
     try:
-        # 2. Inicia o Dashboard (Streamlit) em processo separado (background)
+        # 2. Inicia o Dashboard (Streamlit) e o Script Principal (Câmera) juntos:
+        # os modelos carregam enquanto o servidor web sobe
         print("Iniciando Dashboard (Aguarde abrir no navegador)...")
         # Usamos Popen para não travar o código aqui
         processo_dash = subprocess.Popen(["streamlit", "run", SCRIPT_DASHBOARD])
-        
-        # Dá um tempinho para o servidor subir
-        time.sleep(3)
 
-        # 3. Inicia o Script Principal (Câmera)
         print("Iniciando Sistema de Visão Computacional...")
-        # Usamos run para que o Python ESPERE esse processo terminar antes de fechar tudo
-        subprocess.run([sys.executable, SCRIPT_PRINCIPAL])
+        if os.path.exists(ARQUIVO_PRONTO):
+            os.remove(ARQUIVO_PRONTO) # Sobra de uma execução interrompida
+        processo_principal = subprocess.Popen([sys.executable, SCRIPT_PRINCIPAL])
+
+        # 3. Espera os sinais de prontidão em vez de um tempo fixo
+        aguardar("Dashboard", dashboard_respondendo, processo_dash)
+        aguardar("Portaria", lambda: os.path.exists(ARQUIVO_PRONTO), processo_principal)
+
+        # Esperamos o processo principal terminar antes de fechar tudo
+        processo_principal.wait()
 
     except KeyboardInterrupt:
         print("\nEncerrando pelo teclado...")
@@ -50,6 +85,8 @@ def iniciar_sistema():
     finally:
         # 4. Encerramento Limpo
         print("\nEncerrando Dashboard e limpando processos...")
+        if 'processo_principal' in locals() and processo_principal.poll() is None:
+            processo_principal.terminate()
         if 'processo_dash' in locals():
             processo_dash.terminate() # Mata o processo do streamlit
         print("Sistema finalizado. Até logo!")